@@ -1,10 +1,18 @@
 import os
-import json
 import tempfile
+from google.cloud import bigquery
 from google.cloud import storage
 from core.base import BaseLoader
+from core import serialization
 from connector.bigquery_destination import BigQueryDestination
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Arrow loads need pyarrow
+    pa = None
+    pq = None
+
 class BigQueryLoader(BaseLoader):
     """
     A class to load data into BigQuery, potentially via GCS staging.
@@ -61,9 +69,9 @@ class BigQueryLoader(BaseLoader):
             blob_name = f"{self.gcs_path_prefix}/{table_name}/{timestamp}.json"
             blob = bucket.blob(blob_name)
             
-            # Write data to temporary file, then upload
-            with tempfile.NamedTemporaryFile(mode='w+', suffix='.json', delete=False) as temp:
-                json.dump(data, temp)
+            # Write data to temporary file as newline-delimited JSON, then upload
+            with tempfile.NamedTemporaryFile(mode='wb', suffix='.json', delete=False) as temp:
+                serialization.dump_ndjson(data, temp)
                 temp_file_name = temp.name
             
             # Upload the file to GCS
@@ -80,15 +88,43 @@ class BigQueryLoader(BaseLoader):
             self.logger.error(f"Error uploading to GCS: {str(e)}")
             raise ValueError(f"Error uploading to GCS: {str(e)}")
     
-    def load_to_bigquery(self, dataset_id, table_id, data=None, gcs_uri=None):
-        """Load data into BigQuery, either directly or from GCS"""
+    def typed_schema(self, column_types):
+        """
+        Build the explicit load schema of typed records.
+
+        Args:
+            column_types: Source column -> PostgreSQL data type
+
+        Returns:
+            List of SchemaFields: the metadata columns, then the source columns
+            with their BigQuery types
+        """
+        schema = [
+            bigquery.SchemaField("_raw_id", "STRING"),
+            bigquery.SchemaField("_extracted_at", "TIMESTAMP"),
+            bigquery.SchemaField("_loaded_at", "TIMESTAMP"),
+            bigquery.SchemaField("_meta", "STRING"),
+            bigquery.SchemaField("_generation_id", "STRING")
+        ]
+        for name, pg_type in column_types.items():
+            schema.append(bigquery.SchemaField(name, self.destination._map_pg_type_to_bq(pg_type or "")))
+        return schema
+
+    def load_to_bigquery(self, dataset_id, table_id, data=None, gcs_uri=None, schema=None):
+        """
+        Load data into BigQuery, either directly or from GCS
+
+        Args:
+            schema: Explicit load schema (see typed_schema); detected from the
+                data when None
+        """
         try:
             # Make sure the dataset exists
             self.destination.create_dataset(dataset_id)
             
             if gcs_uri:
                 # Load from GCS
-                job_config = self._create_load_job_config()
+                job_config = self._create_load_job_config(schema=schema)
                 load_job = self.destination.bq_client.load_table_from_uri(
                     gcs_uri,
                     f"{self.destination.project_id}.{dataset_id}.{table_id}",
@@ -99,11 +135,11 @@ class BigQueryLoader(BaseLoader):
             
             elif data:
                 # Load directly from JSON data
-                job_config = self._create_load_job_config()
+                job_config = self._create_load_job_config(schema=schema)
                 
-                # Write data to temp file, then load
-                with tempfile.NamedTemporaryFile(mode='w+', suffix='.json', delete=False) as temp:
-                    json.dump(data, temp)
+                # Write data to temp file as newline-delimited JSON, then load
+                with tempfile.NamedTemporaryFile(mode='wb', suffix='.json', delete=False) as temp:
+                    serialization.dump_ndjson(data, temp)
                     temp_file_name = temp.name
                 
                 with open(temp_file_name, 'rb') as f:
@@ -127,13 +163,62 @@ class BigQueryLoader(BaseLoader):
             self.logger.error(f"Error loading data to BigQuery: {str(e)}")
             raise ValueError(f"Error loading data to BigQuery: {str(e)}")
     
-    def _create_load_job_config(self):
+    def load_arrow_to_bigquery(self, dataset_id, table_id, batches):
+        """
+        Load Arrow RecordBatches into BigQuery through a Parquet file.
+
+        The batches are concatenated without copying and `_loaded_at` is set
+        column-wise before the file is written.
+        """
+        if pa is None:
+            raise ValueError("pyarrow is required for Arrow loads")
+        try:
+            self.destination.create_dataset(dataset_id)
+
+            table = pa.Table.from_batches(batches)
+            loaded_at = self._get_loaded_at()
+            index = table.schema.get_field_index("_loaded_at")
+            loaded_at_type = table.schema.field(index).type
+            table = table.set_column(index, "_loaded_at", pa.repeat(pa.scalar(loaded_at, loaded_at_type), table.num_rows))
+
+            with tempfile.NamedTemporaryFile(suffix='.parquet', delete=False) as temp:
+                temp_file_name = temp.name
+            pq.write_table(table, temp_file_name, compression="zstd")
+
+            job_config = self._create_load_job_config(bigquery.SourceFormat.PARQUET)
+            with open(temp_file_name, 'rb') as f:
+                load_job = self.destination.bq_client.load_table_from_file(
+                    f,
+                    f"{self.destination.project_id}.{dataset_id}.{table_id}",
+                    job_config=job_config
+                )
+                load_job.result()  # Wait for the job to complete
+
+            os.remove(temp_file_name)
+            self.logger.info(f"Loaded {table.num_rows} records to {dataset_id}.{table_id}")
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Error loading Arrow data to BigQuery: {str(e)}")
+            raise ValueError(f"Error loading Arrow data to BigQuery: {str(e)}")
+
+    def _create_load_job_config(self, source_format=bigquery.SourceFormat.NEWLINE_DELIMITED_JSON, schema=None):
         """Create a job config for loading data"""
-        job_config = self.destination.bq_client.LoadJobConfig()
-        job_config.source_format = self.destination.bq_client.job.SourceFormat.NEWLINE_DELIMITED_JSON
-        job_config.autodetect = True
-        job_config.write_disposition = self.destination.bq_client.job.WriteDisposition.WRITE_APPEND
+        job_config = bigquery.LoadJobConfig()
+        job_config.source_format = source_format
+        if schema:
+            job_config.schema = schema
+            # Columns added at the source are added to the table
+            job_config.schema_update_options = [bigquery.SchemaUpdateOption.ALLOW_FIELD_ADDITION]
+        else:
+            job_config.autodetect = True
+        job_config.write_disposition = bigquery.WriteDisposition.WRITE_APPEND
         return job_config
+
+    def _get_loaded_at(self):
+        """Get the UTC time recorded in _loaded_at"""
+        from datetime import datetime, timezone
+        return datetime.now(timezone.utc)
     
     def _get_timestamp(self):
         """Generate a timestamp string for use in file names"""
@@ -0,0 +1,94 @@
+"""
+In-memory cache of each Source's tables and columns.
+
+Within CATALOG_CACHE_TTL seconds an entry is served as is. After that the
+source's catalog fingerprint (see postgres_catalog.FINGERPRINT_QUERY) is
+checked, and the tables are only reloaded when it changed. Reloads are served
+from the current SchemaVersion when it was fetched at the same fingerprint.
+"""
+import os
+import time
+import logging
+import threading
+from typing import Dict, List, Any, Optional
+
+from models.database import SchemaVersion
+from models import schema_store
+from connector.postgres_source import PostgresSource
+
+logger = logging.getLogger("catalog_cache")
+
+# Seconds a cached catalog is served without checking the source
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", 60))
+
+# source_id -> {"fingerprint", "tables", "checked_at"}
+_entries = {}
+_entries_lock = threading.Lock()
+
+def _postgres(source):
+    return PostgresSource(
+        host=source.host,
+        port=source.port,
+        database=source.database,
+        user=source.user,
+        password=source.password,
+        pooled=True,
+        schemas=source.schemas
+    )
+
+def _tables_from_schema_version(db, source_id, fingerprint):
+    """Get tables and columns from the current SchemaVersion if it matches the fingerprint"""
+    # The fingerprint has its own column, so the deferred schema isn't loaded to compare it
+    current = db.query(SchemaVersion).filter(
+        SchemaVersion.source_id == source_id,
+        SchemaVersion.is_current == True,
+        SchemaVersion.catalog_fingerprint == fingerprint
+    ).first()
+    if not current:
+        return None
+    return {name: table.get("columns", []) for name, table in schema_store.load_tables(db, current).items()}
+
+def get_catalog(db, source) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Get the tables of a Source with their columns.
+
+    Args:
+        db: Database session
+        source: Source model
+
+    Returns:
+        Dict[str, List[Dict[str, Any]]]: Table names mapped to column details,
+            as returned by PostgresSource.fetch_all_tables_with_columns
+    """
+    now = time.monotonic()
+    with _entries_lock:
+        entry = _entries.get(source.id)
+    if entry and now - entry["checked_at"] < CATALOG_CACHE_TTL:
+        return entry["tables"]
+
+    postgres = _postgres(source)
+    fingerprint = postgres.fetch_catalog_fingerprint()
+    if fingerprint is None:
+        # Can't tell whether the catalog changed; don't cache
+        return postgres.fetch_all_tables_with_columns()
+
+    if entry and entry["fingerprint"] == fingerprint:
+        tables = entry["tables"]
+    else:
+        tables = _tables_from_schema_version(db, source.id, fingerprint)
+        if tables is None:
+            tables = postgres.fetch_all_tables_with_columns()
+        logger.info(f"Loaded catalog of source {source.id} ({len(tables)} tables)")
+
+    with _entries_lock:
+        _entries[source.id] = {"fingerprint": fingerprint, "tables": tables, "checked_at": now}
+    return tables
+
+def get_table_columns(db, source, table_name) -> Optional[List[Dict[str, Any]]]:
+    """Get the columns of a table of a Source, or None if the table doesn't exist"""
+    return get_catalog(db, source).get(table_name)
+
+def invalidate(source_id):
+    """Drop the cached catalog of a Source"""
+    with _entries_lock:
+        _entries.pop(source_id, None)
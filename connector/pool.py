@@ -0,0 +1,155 @@
+"""
+Pooled PostgreSQL connections.
+
+Sync pools are process-wide and shared by every PostgresSource with the same
+connection parameters (API requests, scheduler, workers). Async pools are
+bound to an event loop: the API keeps one per source in its loop, plus a
+separate small one for streamed queries, and extract jobs open their own,
+shared by the job's batches and parallel ranges.
+"""
+import os
+import asyncio
+import logging
+import threading
+from contextlib import asynccontextmanager
+
+from psycopg_pool import ConnectionPool, AsyncConnectionPool
+
+logger = logging.getLogger("pool")
+
+# Connections kept open per source, even when idle
+PG_POOL_MIN_SIZE = int(os.getenv("PG_POOL_MIN_SIZE", 1))
+
+# Max connections per source and process
+PG_POOL_MAX_SIZE = int(os.getenv("PG_POOL_MAX_SIZE", 5))
+
+# Seconds before idle connections above min size are closed
+PG_POOL_MAX_IDLE = float(os.getenv("PG_POOL_MAX_IDLE", 300))
+
+# Seconds to wait for a free connection before failing
+PG_POOL_TIMEOUT = float(os.getenv("PG_POOL_TIMEOUT", 30))
+
+# Max connections per source and event loop held by streamed queries, which
+# keep theirs for a whole download and so don't borrow from the source's pool
+PG_STREAM_POOL_MAX_SIZE = int(os.getenv("PG_STREAM_POOL_MAX_SIZE", 2))
+
+_pools = {}
+_async_pools = {}  # (event loop, key, stream) -> pool
+_pools_lock = threading.Lock()
+
+def _pool_key(conn_params):
+    return tuple(sorted((key, str(value)) for key, value in conn_params.items()))
+
+def _pool_name(conn_params):
+    return f"{conn_params.get('host')}:{conn_params.get('port')}/{conn_params.get('dbname', conn_params.get('database'))}"
+
+def get_pool(conn_params) -> ConnectionPool:
+    """
+    Get the process-wide pool for a set of connection parameters, opening it on first use.
+
+    Connections are health checked when handed out and idle ones above the
+    min size are evicted after PG_POOL_MAX_IDLE seconds.
+
+    Args:
+        conn_params: psycopg connection parameters (host, port, dbname, user, password)
+    """
+    key = _pool_key(conn_params)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool.closed:
+            pool = ConnectionPool(
+                kwargs=dict(conn_params),
+                min_size=PG_POOL_MIN_SIZE,
+                max_size=max(PG_POOL_MAX_SIZE, PG_POOL_MIN_SIZE),
+                max_idle=PG_POOL_MAX_IDLE,
+                timeout=PG_POOL_TIMEOUT,
+                check=ConnectionPool.check_connection,
+                name=_pool_name(conn_params),
+                open=True
+            )
+            _pools[key] = pool
+            logger.info(f"Opened connection pool for {pool.name}")
+        return pool
+
+def _new_async_pool(conn_params, max_size=None, min_size=1, name=None):
+    return AsyncConnectionPool(
+        kwargs=dict(conn_params),
+        min_size=min_size,
+        max_size=max(max_size or PG_POOL_MAX_SIZE, 1),
+        max_idle=PG_POOL_MAX_IDLE,
+        timeout=PG_POOL_TIMEOUT,
+        check=AsyncConnectionPool.check_connection,
+        name=name or _pool_name(conn_params),
+        open=False
+    )
+
+async def get_async_pool(conn_params, stream=False) -> AsyncConnectionPool:
+    """
+    Get the async pool for a set of connection parameters in the running event loop,
+    opening it on first use.
+
+    Args:
+        conn_params: psycopg connection parameters
+        stream: Get the pool of streamed queries instead, capped at
+            PG_STREAM_POOL_MAX_SIZE and keeping no idle connections
+    """
+    loop = asyncio.get_running_loop()
+    key = (loop, _pool_key(conn_params), stream)
+    with _pools_lock:
+        pool = _async_pools.get(key)
+        if pool is None or pool.closed:
+            if stream:
+                pool = _new_async_pool(conn_params, PG_STREAM_POOL_MAX_SIZE, min_size=0, name=f"{_pool_name(conn_params)} (stream)")
+            else:
+                pool = _new_async_pool(conn_params)
+            _async_pools[key] = pool
+            logger.info(f"Opened async connection pool for {pool.name}")
+    # No-op once the pool is open
+    await pool.open()
+    return pool
+
+def close_pool(conn_params):
+    """Close the pools of a set of connection parameters, e.g. when a source changes or is deleted"""
+    key = _pool_key(conn_params)
+    with _pools_lock:
+        pool = _pools.pop(key, None)
+        async_pools = [(loop, _async_pools.pop((loop, pool_key, stream))) for loop, pool_key, stream in list(_async_pools) if pool_key == key]
+    if pool is not None:
+        pool.close()
+        logger.info(f"Closed connection pool for {pool.name}")
+    for loop, async_pool in async_pools:
+        # Async pools are closed in their own loop
+        if not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(async_pool.close(), loop)
+
+def close_all_pools():
+    """Close every pool of the process"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+async def close_async_pools():
+    """Close every async pool of the running event loop"""
+    loop = asyncio.get_running_loop()
+    with _pools_lock:
+        pools = [_async_pools.pop(key) for key in list(_async_pools) if key[0] is loop]
+    for pool in pools:
+        await pool.close()
+
+@asynccontextmanager
+async def async_pool(conn_params, max_size=None):
+    """
+    Open an async pool for the duration of the block.
+
+    Args:
+        conn_params: psycopg connection parameters
+        max_size: Max connections (default: PG_POOL_MAX_SIZE)
+    """
+    pool = _new_async_pool(conn_params, max_size)
+    await pool.open()
+    try:
+        yield pool
+    finally:
+        await pool.close()
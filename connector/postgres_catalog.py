@@ -0,0 +1,293 @@
+"""
+Set-based PostgreSQL catalog introspection.
+
+Each query returns rows for every relation of a list of schemas at once, so
+a full catalog is fetched with a fixed number of queries, pipelined over one
+connection, regardless of the number of tables or schemas. Relations outside
+the public schema are named schema-qualified ("tenant.orders").
+"""
+import os
+import asyncio
+from typing import Dict, Any, List, Tuple
+
+# Schemas introspected per connection by the async catalog fetch
+CATALOG_SCHEMA_CHUNK_SIZE = int(os.getenv("CATALOG_SCHEMA_CHUNK_SIZE", 50))
+
+# Schema chunks introspected concurrently by the async catalog fetch
+CATALOG_FETCH_CONCURRENCY = int(os.getenv("CATALOG_FETCH_CONCURRENCY", 4))
+
+DEFAULT_SCHEMA = "public"
+
+# Tables (and views, as in information_schema.tables)
+TABLES_QUERY = """
+    SELECT table_schema, table_name
+    FROM information_schema.tables
+    WHERE table_schema = ANY(%(schemas)s)
+    ORDER BY table_schema, table_name
+"""
+
+# Columns of every table and view
+COLUMNS_QUERY = """
+    SELECT
+        table_schema,
+        table_name,
+        column_name,
+        data_type,
+        character_maximum_length,
+        is_nullable,
+        column_default
+    FROM information_schema.columns
+    WHERE table_schema = ANY(%(schemas)s)
+    ORDER BY table_schema, table_name, ordinal_position
+"""
+
+# Primary key columns, in key order
+PRIMARY_KEYS_QUERY = """
+    SELECT
+        n.nspname AS table_schema,
+        t.relname AS table_name,
+        a.attname AS column_name
+    FROM
+        pg_index i
+        JOIN pg_class t ON t.oid = i.indrelid
+        JOIN pg_namespace n ON n.oid = t.relnamespace
+        JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+    WHERE
+        n.nspname = ANY(%(schemas)s) AND
+        i.indisprimary
+    ORDER BY n.nspname, t.relname, array_position(i.indkey::int2[], a.attnum)
+"""
+
+FOREIGN_KEYS_QUERY = """
+    SELECT
+        tc.table_schema,
+        tc.table_name,
+        kcu.column_name,
+        ccu.table_schema AS foreign_table_schema,
+        ccu.table_name AS foreign_table_name,
+        ccu.column_name AS foreign_column_name
+    FROM
+        information_schema.table_constraints AS tc
+        JOIN information_schema.key_column_usage AS kcu
+            ON tc.constraint_name = kcu.constraint_name
+            AND tc.table_schema = kcu.table_schema
+        JOIN information_schema.constraint_column_usage AS ccu
+            ON ccu.constraint_name = tc.constraint_name
+            AND ccu.table_schema = tc.table_schema
+    WHERE
+        tc.constraint_type = 'FOREIGN KEY' AND
+        tc.table_schema = ANY(%(schemas)s)
+"""
+
+INDEXES_QUERY = """
+    SELECT
+        n.nspname AS table_schema,
+        t.relname AS table_name,
+        i.relname AS index_name,
+        a.attname AS column_name,
+        ix.indisunique AS is_unique
+    FROM
+        pg_index ix
+        JOIN pg_class t ON t.oid = ix.indrelid
+        JOIN pg_class i ON i.oid = ix.indexrelid
+        JOIN pg_namespace n ON n.oid = t.relnamespace
+        JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = ANY(ix.indkey)
+    WHERE
+        n.nspname = ANY(%(schemas)s) AND
+        t.relkind = 'r'
+    ORDER BY n.nspname, t.relname, i.relname, a.attnum
+"""
+
+# Planner row count estimates
+ROW_ESTIMATES_QUERY = """
+    SELECT
+        n.nspname AS table_schema,
+        c.relname AS table_name,
+        c.reltuples::bigint
+    FROM
+        pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE
+        n.nspname = ANY(%(schemas)s) AND
+        c.relkind IN ('r', 'p', 'v', 'm', 'f')
+"""
+
+VIEWS_QUERY = """
+    SELECT
+        table_schema,
+        table_name AS view_name,
+        view_definition
+    FROM information_schema.views
+    WHERE table_schema = ANY(%(schemas)s)
+"""
+
+FUNCTIONS_QUERY = """
+    SELECT
+        n.nspname AS function_schema,
+        p.proname AS function_name,
+        pg_get_functiondef(p.oid) AS function_def
+    FROM
+        pg_proc p
+        JOIN pg_namespace n ON p.pronamespace = n.oid
+    WHERE
+        n.nspname = ANY(%(schemas)s)
+"""
+
+# Cheap digest of the schema's catalog rows. Any DDL on a relation or column
+# rewrites its pg_class / pg_attribute row and so changes the row's xmin.
+FINGERPRINT_QUERY = """
+    SELECT md5(
+        coalesce((
+            SELECT string_agg(c.oid::text || ':' || c.xmin::text, ',' ORDER BY c.oid)
+            FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = ANY(%(schemas)s) AND c.relkind IN ('r', 'p', 'v', 'm', 'f', 'i')
+        ), '') || '|' || coalesce((
+            SELECT string_agg(a.attrelid::text || '.' || a.attnum::text || ':' || a.xmin::text, ',' ORDER BY a.attrelid, a.attnum)
+            FROM pg_attribute a
+                JOIN pg_class c ON c.oid = a.attrelid
+                JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = ANY(%(schemas)s) AND c.relkind IN ('r', 'p', 'v', 'm', 'f') AND a.attnum > 0
+        ), '')
+    )
+"""
+
+# Queries run for a full schema fetch, keyed by the name their rows are assembled under
+CATALOG_QUERIES = {
+    "tables": TABLES_QUERY,
+    "columns": COLUMNS_QUERY,
+    "primary_keys": PRIMARY_KEYS_QUERY,
+    "foreign_keys": FOREIGN_KEYS_QUERY,
+    "indexes": INDEXES_QUERY,
+    "row_estimates": ROW_ESTIMATES_QUERY,
+    "views": VIEWS_QUERY,
+    "functions": FUNCTIONS_QUERY,
+}
+
+def qualified_name(schema_name: str, name: str) -> str:
+    """Name of a relation as used in schema dicts and sync tables"""
+    return name if schema_name == DEFAULT_SCHEMA else f"{schema_name}.{name}"
+
+def split_qualified_name(qualified: str) -> Tuple[str, str]:
+    """Split a (possibly schema-qualified) relation name into (schema, name)"""
+    if "." in qualified:
+        schema_name, name = qualified.split(".", 1)
+        return schema_name, name
+    return DEFAULT_SCHEMA, qualified
+
+def fetch_catalog_rows(conn, schemas: List[str]) -> Dict[str, List[Tuple]]:
+    """
+    Run every catalog query for a list of schemas in one pipeline on an open connection.
+
+    Returns:
+        Dict[str, List[Tuple]]: Rows of each query in CATALOG_QUERIES
+    """
+    params = {"schemas": list(schemas)}
+    with conn.pipeline():
+        cursors = {name: conn.execute(query, params) for name, query in CATALOG_QUERIES.items()}
+    return {name: cur.fetchall() for name, cur in cursors.items()}
+
+async def fetch_catalog_rows_async(conn, schemas: List[str]) -> Dict[str, List[Tuple]]:
+    """Async version of fetch_catalog_rows, on an open AsyncConnection"""
+    params = {"schemas": list(schemas)}
+    async with conn.pipeline():
+        cursors = {name: await conn.execute(query, params) for name, query in CATALOG_QUERIES.items()}
+    return {name: await cur.fetchall() for name, cur in cursors.items()}
+
+async def fetch_catalog_rows_concurrently(connection, schemas: List[str]) -> Dict[str, List[Tuple]]:
+    """
+    Fetch the catalog rows of many schemas, in chunks of CATALOG_SCHEMA_CHUNK_SIZE
+    schemas introspected concurrently on their own connections.
+
+    Args:
+        connection: Callable returning an async context manager yielding an AsyncConnection
+        schemas: Schemas to introspect
+    """
+    semaphore = asyncio.Semaphore(max(CATALOG_FETCH_CONCURRENCY, 1))
+
+    async def fetch_chunk(chunk):
+        async with semaphore:
+            async with connection() as conn:
+                return await fetch_catalog_rows_async(conn, chunk)
+
+    chunks = [schemas[i:i + CATALOG_SCHEMA_CHUNK_SIZE] for i in range(0, len(schemas), CATALOG_SCHEMA_CHUNK_SIZE)]
+    results = await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks))
+    return {name: [row for rows in results for row in rows[name]] for name in CATALOG_QUERIES}
+
+def column_details(row) -> Dict[str, Any]:
+    """Convert a (name, data_type, max_length, is_nullable, default) row to a column dict"""
+    return {
+        'name': row[0],
+        'data_type': row[1],
+        'max_length': row[2],
+        'nullable': row[3] == 'YES',
+        'default': row[4]
+    }
+
+def assemble_schema(rows: Dict[str, List[Tuple]], database_info: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Assemble catalog query rows into the schema dict returned by PostgresSource.fetch_schema.
+
+    Args:
+        rows: Rows of each query in CATALOG_QUERIES
+        database_info: Database level information (name, version, ...)
+    """
+    columns = {}
+    for row in rows["columns"]:
+        columns.setdefault(qualified_name(row[0], row[1]), []).append(column_details(row[2:]))
+
+    primary_keys = {}
+    for schema_name, table_name, column_name in rows["primary_keys"]:
+        primary_keys.setdefault(qualified_name(schema_name, table_name), []).append(column_name)
+
+    foreign_keys = {}
+    for schema_name, table_name, column_name, foreign_schema, foreign_table, foreign_column in rows["foreign_keys"]:
+        foreign_keys.setdefault(qualified_name(schema_name, table_name), []).append({
+            'column': column_name,
+            'references_table': qualified_name(foreign_schema, foreign_table),
+            'references_column': foreign_column
+        })
+
+    indexes = {}
+    for schema_name, table_name, index_name, column_name, is_unique in rows["indexes"]:
+        table_indexes = indexes.setdefault(qualified_name(schema_name, table_name), {})
+        if index_name not in table_indexes:
+            table_indexes[index_name] = {"columns": [], "unique": is_unique}
+        table_indexes[index_name]["columns"].append(column_name)
+
+    row_estimates = {
+        qualified_name(schema_name, table_name): int(estimate) if estimate else 0
+        for schema_name, table_name, estimate in rows["row_estimates"]
+    }
+
+    schema = {
+        "tables": {},
+        "views": {},
+        "functions": [],
+        "database_info": dict(database_info)
+    }
+    for schema_name, table_name in rows["tables"]:
+        name = qualified_name(schema_name, table_name)
+        schema["tables"][name] = {
+            "name": name,
+            "columns": columns.get(name, []),
+            "primary_key": primary_keys.get(name, []),
+            "foreign_keys": foreign_keys.get(name, []),
+            "indexes": list(indexes.get(name, {}).values()),
+            "estimated_row_count": row_estimates.get(name, 0)
+        }
+
+    for schema_name, view_name, view_def in rows["views"]:
+        name = qualified_name(schema_name, view_name)
+        schema["views"][name] = {
+            "name": name,
+            "columns": columns.get(name, []),
+            "definition": view_def
+        }
+
+    for schema_name, func_name, func_def in rows["functions"]:
+        schema["functions"].append({
+            "name": qualified_name(schema_name, func_name),
+            "definition": func_def
+        })
+
+    return schema
@@ -1,21 +1,52 @@
 import os
-import json
+import math
+import asyncio
 import psycopg
 import logging
-from datetime import datetime
+from contextlib import asynccontextmanager
+from psycopg import sql
+from decimal import Decimal
+from datetime import date, datetime
 from core.base import BaseExtractor
 from core.jobs import ExtractJob
 from connector.postgres_source import PostgresSource
+from connector import spool
+from connector import pool
 from worker.job_manager import update_job_status
 
 logger = logging.getLogger("extract")
 
+# Supported extraction modes:
+# - keyset: one ORDER BY ... LIMIT query (and connection) per batch
+# - stream: one connection and one server-side cursor per job, read with fetchmany
+# - copy: COPY (SELECT ...) TO STDOUT streamed straight into spool files
+EXTRACT_MODES = ("keyset", "stream", "copy")
+
+# COPY formats and the spool file extension used for each. Only CSV can be
+# read back as records (see spool.read_batch), so it is the only one offered.
+COPY_FORMATS = {"csv": "csv"}
+
+# COPY output is rolled over into a new spool file past this size
+COPY_SPOOL_FILE_BYTES = int(os.getenv("COPY_SPOOL_FILE_BYTES", 256 * 1024 * 1024))
+
 class PostgresExtractor(BaseExtractor):
-    def __init__(self, conn_params, save_to_disk=True):
+    def __init__(self, conn_params, save_to_disk=True, offload_result=False, batch_format="records"):
         super().__init__(conn_params)
-        self.source = PostgresSource(**conn_params)
+        self.source = PostgresSource(**conn_params, pooled=True)
         self.output_dir = os.path.join(os.getcwd(), "data", "output")
         self.save_to_disk = save_to_disk
+        # Return a manifest of spool files instead of the extracted rows
+        self.offload_result = offload_result
+        if self.offload_result and not self.save_to_disk:
+            raise ValueError("Result offloading requires save_to_disk")
+        # Batches are lists of dicts ("records") or Arrow RecordBatches ("arrow")
+        if batch_format not in ("records", "arrow"):
+            raise ValueError(f"Unsupported batch format: {batch_format}")
+        self.batch_format = batch_format
+        # Async pool of the running job, shared by its batches and parallel ranges
+        self._pool = None
+        # Column -> PostgreSQL data type of the running job's table, fixing its Arrow schema
+        self._column_types = None
         if self.save_to_disk:
             os.makedirs(self.output_dir, exist_ok=True)
 
@@ -25,48 +56,24 @@ class PostgresExtractor(BaseExtractor):
     async def extract_incremental(self, job_dict):
         job = ExtractJob(**job_dict)
         extracted_batches = []  # Store batches if not saving to disk
+        manifest = []  # Spool files written for this job
 
         try:
-            job.status = "running"
-            job.updated_at = datetime.now().isoformat()
-            cursor_value = job.cursor_value if job.cursor_value else "(0,0)" if job.use_ctid else None
-            has_more_data = True
-            batch_num = 0
-
-            while has_more_data:
-                batch_data, next_cursor_value = await self._extract_batch(
-                    job.table_name, 
-                    job.use_ctid, 
-                    job.cursor_column if not job.use_ctid else None, 
-                    cursor_value, 
-                    job.batch_size
-                )
-                if len(batch_data) < job.batch_size or next_cursor_value == cursor_value:
-                    has_more_data = False
-
-                if batch_data:
-                    batch_num += 1
-
-                    # Save data to disk if configured
-                    if self.save_to_disk:
-                        file_path = self._get_output_path(job.table_name, job.id, batch_num)
-                        self._save_to_json(batch_data, file_path)
+            if job.extract_mode == "copy":
+                return await self._extract_copy(job)
 
-                    # Always keep data in memory for return
+            async for batch_data in self.iter_batches(job, manifest):
+                # Keep data in memory for return unless it is offloaded to the spool files
+                if not self.offload_result:
                     extracted_batches.append(batch_data)
 
-                    job.extracted_records += len(batch_data)
-                    job.updated_at = datetime.now().isoformat()
-                    job.cursor_value = next_cursor_value
-                    cursor_value = next_cursor_value
-                    update_job_status(job)
-                else:
-                    has_more_data = False
-
             job.status = "completed"
             job.updated_at = datetime.now().isoformat()
             update_job_status(job)
 
+            if self.offload_result:
+                return self._manifest_result(job, manifest)
+
             # Return both status and extracted data
             return {
                 "success": True,
@@ -88,37 +95,535 @@ class PostgresExtractor(BaseExtractor):
                 "job_id": job.id
             }
 
-    async def _extract_batch(self, table_name, use_ctid, cursor_column, cursor_value, batch_size):
+    async def iter_batches(self, job, manifest=None):
+        """
+        Yield the job's extracted batches one at a time.
+
+        Each batch is saved to disk if configured and the job's progress and
+        cursor are updated in Redis before it is handed to the caller. The
+        caller is responsible for marking the job completed or failed.
+
+        Args:
+            job: ExtractJob to run (updated in place)
+            manifest: Optional list collecting an entry per spool file written
+        """
+        if job.extract_mode not in EXTRACT_MODES or job.extract_mode == "copy":
+            raise ValueError(f"Unsupported extract mode for batch iteration: {job.extract_mode}")
+        if job.spool_format not in spool.SPOOL_FORMATS:
+            raise ValueError(f"Unsupported spool format: {job.spool_format}")
+
+        job.status = "running"
+        job.updated_at = datetime.now().isoformat()
+        cursor_value = job.cursor_value if job.cursor_value is not None else "(0,0)" if job.use_ctid else None
+        cursor_column = job.cursor_column if not job.use_ctid else None
+        batch_num = 0
+
+        if job.parallelism > 1 and job.use_ctid:
+            batches = self._parallel_ctid_batches(
+                job.table_name,
+                cursor_value,
+                job.batch_size,
+                job.parallelism,
+                job.extract_mode == "stream"
+            )
+        elif job.parallelism > 1:
+            batches = self._parallel_keyset_batches(
+                job.table_name,
+                cursor_column,
+                cursor_value,
+                job.batch_size,
+                job.parallelism,
+                job.extract_mode == "stream"
+            )
+        elif job.extract_mode == "stream":
+            batches = self._stream_batches(job.table_name, job.use_ctid, cursor_column, cursor_value, job.batch_size)
+        else:
+            batches = self._keyset_batches(job.table_name, job.use_ctid, cursor_column, cursor_value, job.batch_size)
+
+        # One connection per parallel range, plus one for range planning
+        async with pool.async_pool(self.conn_params, max_size=job.parallelism + 1) as self._pool:
+            try:
+                if self.batch_format == "arrow" or job.spool_format != "json":
+                    # Type every batch from the catalog, not from its own values
+                    self._column_types = {**await self._fetch_column_types(job.table_name), **(job.column_types or {})}
+                async for batch_data, next_cursor_value in batches:
+                    batch_num += 1
+
+                    # Save data to disk if configured
+                    if self.save_to_disk:
+                        file_path = self._get_output_path(job.table_name, job.id, batch_num, spool.SPOOL_FORMATS[job.spool_format])
+                        file_bytes = self._save_batch(batch_data, file_path, job.spool_format, self._column_types or job.column_types)
+                        if manifest is not None:
+                            manifest.append({"path": file_path, "records": len(batch_data), "bytes": file_bytes})
+
+                    job.extracted_records += len(batch_data)
+                    job.updated_at = datetime.now().isoformat()
+                    job.cursor_value = next_cursor_value
+                    update_job_status(job)
+
+                    yield batch_data
+            finally:
+                self._pool = None
+                self._column_types = None
+
+    async def _extract_copy(self, job):
+        """Run a COPY extraction for the job and record its progress"""
+        job.status = "running"
+        job.updated_at = datetime.now().isoformat()
+        cursor_value = job.cursor_value if job.cursor_value is not None else "(0,0)" if job.use_ctid else None
+        cursor_column = job.cursor_column if not job.use_ctid else None
+        # CSV fields are text; the transform casts them back with the catalog types
+        job.column_types = {**await self._fetch_column_types(job.table_name), **(job.column_types or {})}
+        manifest, records, next_cursor_value = await self._copy_to_spool(
+            job.table_name,
+            job.id,
+            job.use_ctid,
+            cursor_column,
+            cursor_value,
+            job.copy_format
+        )
+        job.extracted_records += records
+        job.cursor_value = next_cursor_value
+        job.status = "completed"
+        job.updated_at = datetime.now().isoformat()
+        update_job_status(job)
+
+        return self._manifest_result(job, manifest)
+
+    def _manifest_result(self, job, manifest):
+        """Build a task result that references spool files instead of carrying rows"""
+        return {
+            "success": True,
+            "job_id": job.id,
+            "table_name": job.table_name,
+            "records_extracted": job.extracted_records,
+            "manifest": {
+                "files": manifest,
+                "total_records": sum(entry["records"] for entry in manifest),
+                "total_bytes": sum(entry["bytes"] for entry in manifest)
+            }
+        }
+
+    async def _copy_to_spool(self, table_name, job_id, use_ctid, cursor_column, cursor_value, copy_format):
+        """
+        Stream COPY (SELECT ...) TO STDOUT into spool files without decoding rows.
+
+        Extractions are bounded by the cursor column's (or ctid's) current
+        maximum, read in the same REPEATABLE READ snapshot, which becomes the
+        next cursor value. CSV output writes NULL as COPY_NULL.
+
+        Returns:
+            Tuple of (manifest entries per spool file, records copied, next cursor value)
+        """
+        if not self.save_to_disk:
+            raise ValueError("COPY extraction requires save_to_disk")
+        if copy_format not in COPY_FORMATS:
+            raise ValueError(f"Unsupported COPY format: {copy_format}")
+
+        async with self._connect() as conn:
+            async with conn.transaction():
+                await conn.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+
+                if use_ctid:
+                    cursor_column = "ctid"
+                    cur = await conn.execute(
+                        f"SELECT ctid FROM {table_name} WHERE ctid > %s::tid ORDER BY ctid DESC LIMIT 1",
+                        [cursor_value]
+                    )
+                    row = await cur.fetchone()
+                    next_cursor_value = row[0] if row else None
+                else:
+                    if not cursor_column:
+                        raise ValueError("Cursor column must be provided when not using CTID")
+                    where_clause = f"WHERE {cursor_column} > %s" if cursor_value is not None else ""
+                    cur = await conn.execute(
+                        f"SELECT max({cursor_column}) FROM {table_name} {where_clause}",
+                        [cursor_value] if cursor_value is not None else []
+                    )
+                    next_cursor_value = (await cur.fetchone())[0]
+                if next_cursor_value is None:
+                    return [], 0, cursor_value
+
+                conditions = [sql.SQL(f"{cursor_column} <= {{}}").format(sql.Literal(next_cursor_value))]
+                if cursor_value is not None:
+                    conditions.insert(0, sql.SQL(f"{cursor_column} > {{}}").format(sql.Literal(cursor_value)))
+                select = sql.SQL(f"SELECT * FROM {table_name} WHERE {{}}").format(sql.SQL(" AND ").join(conditions))
+
+                options = sql.SQL("FORMAT csv, HEADER true, NULL {}").format(sql.Literal(spool.COPY_NULL))
+                statement = sql.SQL("COPY ({}) TO STDOUT WITH ({})").format(select, options)
+
+                files = []
+                spool_file = None
+                spool_bytes = 0
+                header = None
+                try:
+                    async with conn.cursor() as cur:
+                        async with cur.copy(statement) as copy:
+                            async for data in copy:
+                                if header is None:
+                                    header = bytes(data)
+                                    continue
+
+                                # Every spool file starts with the CSV header
+                                if spool_file is None or spool_bytes >= COPY_SPOOL_FILE_BYTES:
+                                    if spool_file is not None:
+                                        spool_file.close()
+                                    file_path = self._get_output_path(table_name, job_id, len(files) + 1, COPY_FORMATS[copy_format])
+                                    spool_file = open(file_path, "wb")
+                                    spool_bytes = 0
+                                    files.append({"path": file_path, "records": 0, "bytes": 0})
+                                    if header:
+                                        spool_bytes += spool_file.write(header)
+
+                                spool_bytes += spool_file.write(data)
+                                # COPY yields one row per chunk
+                                files[-1]["records"] += 1
+                                files[-1]["bytes"] = spool_bytes
+                        records = max(cur.rowcount, 0)
+                finally:
+                    if spool_file is not None:
+                        spool_file.close()
+
+        logger.info(f"Copied {records} records from {table_name} into {len(files)} spool files")
+        return files, records, next_cursor_value
+
+    async def _keyset_batches(self, table_name, use_ctid, cursor_column, cursor_value, batch_size, upper_value=None):
+        """Yield (batch_data, next_cursor_value) by re-querying ORDER BY ... LIMIT per batch"""
+        while True:
+            batch_data, next_cursor_value = await self._extract_batch(
+                table_name,
+                use_ctid,
+                cursor_column,
+                cursor_value,
+                batch_size,
+                upper_value
+            )
+            if len(batch_data) == 0:
+                return
+
+            yield batch_data, next_cursor_value
+
+            if len(batch_data) < batch_size or next_cursor_value == cursor_value:
+                return
+            cursor_value = next_cursor_value
+
+    async def _stream_batches(self, table_name, use_ctid, cursor_column, cursor_value, batch_size, upper_value=None):
+        """
+        Yield (batch_data, next_cursor_value) from a single server-side cursor.
+
+        The query is executed once on one connection; rows are pulled from the
+        named cursor with fetchmany so the source only sorts/descends the index once.
+        """
+        query, params = self._build_query(table_name, use_ctid, cursor_column, cursor_value, upper_value=upper_value)
+        async for batch in self._stream_query(query, params, table_name, use_ctid, cursor_column, cursor_value, batch_size):
+            yield batch
+
+    async def _stream_query(self, query, params, table_name, use_ctid, cursor_column, cursor_value, batch_size):
+        """Run query on its own connection through a named cursor and yield batches"""
+        cursor_name = f"pgsync_{table_name}_{os.getpid()}".replace(".", "_")
+        async with self._connect() as conn:
+            # Named cursors live inside a transaction; keep it read-only
+            async with conn.transaction():
+                await conn.execute("SET TRANSACTION READ ONLY")
+                async with conn.cursor(name=cursor_name) as cur:
+                    cur.itersize = batch_size
+                    await cur.execute(query, params)
+                    columns = None
+                    while True:
+                        rows = await cur.fetchmany(batch_size)
+                        if not rows:
+                            return
+                        if columns is None:
+                            columns = [desc[0] for desc in cur.description]
+                        batch_data, cursor_value = self._rows_to_batch(rows, columns, use_ctid, cursor_column, cursor_value)
+                        yield batch_data, cursor_value
+
+    async def _parallel_ctid_batches(self, table_name, cursor_value, batch_size, parallelism, streaming):
+        """
+        Yield (batch_data, high_water_ctid) from concurrent ctid block-range scans.
+
+        The table's heap is split into `parallelism` block ranges, each read with
+        a TID range scan on its own connection, so no per-batch sort is needed.
+        The last range is left open-ended to pick up rows appended meanwhile.
+        Batches arrive in completion order; the cursor value yielded is the
+        highest ctid seen so far and is only a safe resume point once the job
+        has completed.
+
+        TID range scans need PostgreSQL 14; older servers would scan the whole
+        table for every range, so the table is read serially instead.
+        """
+        start_block = _parse_ctid(cursor_value)[0] if cursor_value is not None else 0
+        async with self._connect() as conn:
+            server_version = conn.info.server_version
+            if server_version >= 140000:
+                cur = await conn.execute(
+                    "SELECT pg_relation_size(%s::regclass) / current_setting('block_size')::bigint",
+                    [table_name]
+                )
+                total_blocks = (await cur.fetchone())[0]
+
+        if server_version < 140000:
+            logger.info(f"Server version {server_version} has no TID range scans, extracting {table_name} serially")
+            if streaming:
+                batches = self._stream_batches(table_name, True, None, cursor_value, batch_size)
+            else:
+                batches = self._keyset_batches(table_name, True, None, cursor_value, batch_size)
+            async for batch_data, next_cursor_value in batches:
+                yield batch_data, next_cursor_value
+            return
+
+        step = max(math.ceil((total_blocks - start_block) / parallelism), 1)
+        bounds = list(range(start_block, total_blocks, step))[1:parallelism]
+
+        streams = []
+        lower = cursor_value
+        for upper_block in bounds + [None]:
+            conditions = []
+            params = []
+            if lower is not None:
+                # The first range resumes after the cursor, the others start on a block boundary
+                conditions.append("ctid > %s::tid" if lower == cursor_value else "ctid >= %s::tid")
+                params.append(lower)
+            if upper_block is not None:
+                conditions.append("ctid < %s::tid")
+                params.append(f"({upper_block},0)")
+            where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            query = f"SELECT *, ctid FROM {table_name} {where_clause}"
+            streams.append(self._stream_query(query, params, table_name, True, None, lower, batch_size))
+            lower = f"({upper_block},0)" if upper_block is not None else None
+
+        logger.info(f"Extracting {table_name} as {len(streams)} ctid block ranges over {total_blocks} blocks")
+        high_water = cursor_value
+        async for batch_data, next_cursor_value in self._merge_streams(streams):
+            if _parse_ctid(next_cursor_value) > _parse_ctid(high_water):
+                high_water = next_cursor_value
+            yield batch_data, high_water
+
+    async def _parallel_keyset_batches(self, table_name, cursor_column, cursor_value, batch_size, parallelism, streaming):
+        """
+        Yield (batch_data, high_water) from concurrent keyset scans over cursor ranges.
+
+        The cursor column's key space above cursor_value is split into
+        `parallelism` ranges (lower, upper], each extracted as its own keyset
+        stream on its own connection. The upper bound of the last range is the
+        column's maximum when the job started, which is the job's high-water mark
+        once every range has completed.
+        """
+        if not cursor_column:
+            raise ValueError("Cursor column must be provided when not using CTID")
+
+        bounds, high_water = await self._cursor_range_bounds(table_name, cursor_column, cursor_value, parallelism)
+        if high_water is None:
+            return
+
+        streams = []
+        lower = cursor_value
+        for upper in bounds + [high_water]:
+            if streaming:
+                streams.append(self._stream_batches(table_name, False, cursor_column, lower, batch_size, upper))
+            else:
+                streams.append(self._keyset_batches(table_name, False, cursor_column, lower, batch_size, upper))
+            lower = upper
+
+        logger.info(f"Extracting {table_name} as {len(streams)} ranges of {cursor_column}")
+        # Only cursor values read back from the database are compared: the
+        # caller's cursor_value may be a string (from JSON or the sync state)
+        merged = None
+        async for batch_data, next_cursor_value in self._merge_streams(streams):
+            if merged is None or next_cursor_value > merged:
+                merged = next_cursor_value
+            yield batch_data, merged
+
+    async def _cursor_range_bounds(self, table_name, cursor_column, cursor_value, parallelism):
+        """
+        Compute interior split points for the cursor column above cursor_value.
+
+        Numeric and temporal columns are split evenly between min and max;
+        other types fall back to the planner's histogram bounds from pg_stats.
+
+        Returns:
+            Tuple of (sorted split points, current max of the cursor column)
+        """
+        where_clause = f"WHERE {cursor_column} > %s" if cursor_value is not None else ""
+        async with self._connect() as conn:
+            cur = await conn.execute(
+                f"SELECT min({cursor_column}), max({cursor_column}) FROM {table_name} {where_clause}",
+                [cursor_value] if cursor_value is not None else []
+            )
+            low, high = await cur.fetchone()
+            if high is None or low == high:
+                return [], high
+
+            if isinstance(low, (int, float, Decimal, date)) and not isinstance(low, bool):
+                bounds = [_interpolate(low, high, i / parallelism) for i in range(1, parallelism)]
+            else:
+                cur = await conn.execute(
+                    "SELECT format_type(atttypid, atttypmod) FROM pg_attribute WHERE attrelid = %s::regclass AND attname = %s",
+                    [table_name, cursor_column]
+                )
+                column_type = (await cur.fetchone())[0]
+                schema_name, _, relname = table_name.rpartition(".")
+                # Cast the planner's histogram back to the column type so the bounds compare natively
+                cur = await conn.execute(
+                    f"""
+                    SELECT DISTINCT bound FROM (
+                        SELECT unnest(histogram_bounds::text::{column_type}[]) AS bound
+                        FROM pg_stats
+                        WHERE schemaname = coalesce(nullif(%s, ''), current_schema())
+                            AND tablename = %s
+                            AND attname = %s
+                    ) h
+                    WHERE bound > %s AND bound < %s
+                    ORDER BY bound
+                    """,
+                    [schema_name, relname, cursor_column, low, high]
+                )
+                histogram = [row[0] for row in await cur.fetchall()]
+                step = len(histogram) / parallelism
+                bounds = [histogram[int(i * step)] for i in range(1, parallelism)] if histogram else []
+
+        bounds = sorted({bound for bound in bounds if low < bound < high})
+        return bounds, high
+
+    async def _merge_streams(self, streams):
+        """
+        Run several batch streams concurrently and yield their items as they arrive.
+
+        A bounded queue applies backpressure so fast producers can't run ahead of
+        the consumer; the first producer error is re-raised here.
+        """
+        queue = asyncio.Queue(maxsize=len(streams) * 2)
+        finished = object()
+
+        async def pump(stream):
+            try:
+                async for item in stream:
+                    await queue.put(item)
+            except Exception as e:
+                await queue.put(e)
+            else:
+                await queue.put(finished)
+
+        tasks = [asyncio.create_task(pump(stream)) for stream in streams]
+        remaining = len(tasks)
+        try:
+            while remaining:
+                item = await queue.get()
+                if item is finished:
+                    remaining -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _build_query(self, table_name, use_ctid, cursor_column, cursor_value, batch_size=None, upper_value=None):
+        """
+        Build the ordered extraction query, with a LIMIT when batch_size is given
+        and an inclusive cursor upper bound when upper_value is given.
+        """
         if use_ctid:
-            where_clause = "WHERE ctid > %s" if cursor_value else ""
-            params = [cursor_value, batch_size] if cursor_value else [batch_size]
-            query = f"SELECT *, ctid FROM {table_name} {where_clause} ORDER BY ctid ASC LIMIT %s"
+            where_clause = "WHERE ctid > %s" if cursor_value is not None else ""
+            select = f"SELECT *, ctid FROM {table_name} {where_clause} ORDER BY ctid ASC"
+            params = [cursor_value] if cursor_value is not None else []
         else:
             if not cursor_column:
                 raise ValueError("Cursor column must be provided when not using CTID")
-            where_clause = f"WHERE {cursor_column} > %s" if cursor_value else ""
-            params = [cursor_value, batch_size] if cursor_value else [batch_size]
-            query = f"SELECT * FROM {table_name} {where_clause} ORDER BY {cursor_column} ASC LIMIT %s"
-        async with await psycopg.AsyncConnection.connect(**self.conn_params) as conn:
+            conditions = []
+            params = []
+            if cursor_value is not None:
+                conditions.append(f"{cursor_column} > %s")
+                params.append(cursor_value)
+            if upper_value is not None:
+                conditions.append(f"{cursor_column} <= %s")
+                params.append(upper_value)
+            where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            select = f"SELECT * FROM {table_name} {where_clause} ORDER BY {cursor_column} ASC"
+        if batch_size is not None:
+            select += " LIMIT %s"
+            params.append(batch_size)
+        return select, params
+
+    async def _fetch_column_types(self, table_name):
+        """Get column name -> data type of a table from the catalog"""
+        async with self._connect() as conn:
+            cur = await conn.execute(
+                """
+                SELECT attname, format_type(atttypid, atttypmod)
+                FROM pg_attribute
+                WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped
+                ORDER BY attnum
+                """,
+                [table_name]
+            )
+            return {name: data_type for name, data_type in await cur.fetchall()}
+
+    def _rows_to_batch(self, rows, columns, use_ctid, cursor_column, cursor_value):
+        """Convert fetched rows to the batch format and return them with the next cursor value"""
+        if self.batch_format == "arrow":
+            # Transpose once and build column arrays instead of a dict per row
+            keep = [i for i, column in enumerate(columns) if not (use_ctid and column == "ctid")]
+            names = [columns[i] for i in keep]
+            column_values = list(zip(*rows)) if rows else [() for _ in columns]
+            # Columns unknown to the catalog are strings, never inferred per batch
+            column_types = self._column_types or {}
+            batch_data = spool.record_batch_from_columns(
+                names,
+                [column_values[i] for i in keep],
+                {name: column_types.get(name, "text") for name in names}
+            )
+        else:
+            batch_data = []
+            for row in rows:
+                row_dict = {columns[i]: value for i, value in enumerate(row)}
+                if use_ctid:
+                    del row_dict["ctid"]
+                batch_data.append(row_dict)
+        next_cursor_value = (rows[-1][columns.index("ctid")] if use_ctid else rows[-1][columns.index(cursor_column)]) if rows else cursor_value
+        return batch_data, next_cursor_value
+
+    @asynccontextmanager
+    async def _connect(self):
+        """Get a connection from the running job's pool, or a dedicated one outside of a job"""
+        if self._pool is not None:
+            async with self._pool.connection() as conn:
+                yield conn
+        else:
+            async with await psycopg.AsyncConnection.connect(**self.conn_params) as conn:
+                yield conn
+
+    async def _extract_batch(self, table_name, use_ctid, cursor_column, cursor_value, batch_size, upper_value=None):
+        query, params = self._build_query(table_name, use_ctid, cursor_column, cursor_value, batch_size, upper_value)
+        async with self._connect() as conn:
             async with conn.cursor() as cur:
                 await cur.execute(query, params)
                 columns = [desc[0] for desc in cur.description]
-                batch_data = []
                 rows = await cur.fetchall()
-                for row in rows:
-                    row_dict = {columns[i]: value for i, value in enumerate(row)}
-                    if use_ctid:
-                        del row_dict["ctid"]
-                    batch_data.append(row_dict)
-                next_cursor_value = (rows[-1][columns.index("ctid")] if use_ctid else rows[-1][columns.index(cursor_column)]) if rows else cursor_value
-                return batch_data, next_cursor_value
-
-    def _get_output_path(self, table_name, job_id, batch_num):
+                return self._rows_to_batch(rows, columns, use_ctid, cursor_column, cursor_value)
+
+    def _get_output_path(self, table_name, job_id, batch_num, extension="json"):
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{table_name}_{job_id}_{batch_num}_{timestamp}.json"
+        filename = f"{table_name}_{job_id}_{batch_num}_{timestamp}.{extension}"
         return os.path.join(self.output_dir, filename)
 
-    def _save_to_json(self, data, file_path):
-        with open(file_path, "w") as f:
-            json.dump(data, f)
-        logger.info(f"Saved {len(data)} records to {file_path}")
\ No newline at end of file
+    def _save_batch(self, data, file_path, spool_format="json", column_types=None):
+        file_bytes = spool.write_batch(data, file_path, spool_format, column_types)
+        logger.info(f"Saved {len(data)} records to {file_path}")
+        return file_bytes
+
+def _parse_ctid(ctid):
+    """Parse a '(block,offset)' ctid string into a comparable tuple"""
+    block, offset = str(ctid).strip("()").split(",")
+    return int(block), int(offset)
+
+def _interpolate(low, high, fraction):
+    """Return the point at fraction of the way from low to high, keeping low's type"""
+    if isinstance(low, int):
+        return low + int((high - low) * fraction)
+    if isinstance(low, Decimal):
+        return low + (high - low) * Decimal(str(fraction))
+    # float, date and datetime (timedelta * float truncates to whole days for dates)
+    return low + (high - low) * fraction
\ No newline at end of file
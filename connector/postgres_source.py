@@ -1,5 +1,25 @@
+import os
+import uuid
+import asyncio
 import psycopg
-from typing import List, Dict, Tuple, Any
+from contextlib import asynccontextmanager
+from typing import List, Dict, Tuple, Any, Optional, AsyncIterator
+
+from connector import postgres_catalog
+from connector import pool
+
+# Max rows returned by a streamed ad-hoc query
+QUERY_STREAM_MAX_ROWS = int(os.getenv("QUERY_STREAM_MAX_ROWS", 100000))
+
+# Statement timeout of a streamed ad-hoc query, in milliseconds
+QUERY_STREAM_TIMEOUT_MS = int(os.getenv("QUERY_STREAM_TIMEOUT_MS", 60000))
+
+# Time a streamed ad-hoc query's transaction may sit idle waiting on a slow
+# client before the server ends it, in milliseconds
+QUERY_STREAM_IDLE_TIMEOUT_MS = int(os.getenv("QUERY_STREAM_IDLE_TIMEOUT_MS", 30000))
+
+# Rows fetched from the server-side cursor at a time
+QUERY_STREAM_BATCH_ROWS = int(os.getenv("QUERY_STREAM_BATCH_ROWS", 1000))
 
 
 class PostgresSource:
@@ -12,7 +32,9 @@ class PostgresSource:
         port: int = 5432,
         database: str = "",
         user: str = "",
-        password: str = ""
+        password: str = "",
+        pooled: bool = False,
+        schemas: Optional[List[str]] = None
     ):
         """
         Initialize connection parameters for PostgreSQL database.
@@ -23,6 +45,10 @@ class PostgresSource:
             database: Database name
             user: Username for authentication
             password: Password for authentication
+            pooled: Borrow connections from the process-wide pool of these
+                connection parameters instead of opening one per call
+            schemas: Schemas to introspect (default: public); relations
+                outside public are named schema-qualified
         """
         self.host = host
         self.port = port
@@ -36,6 +62,19 @@ class PostgresSource:
             "user": user,
             "password": password
         }
+        self.pooled = pooled
+        self.schemas = list(schemas) if schemas else [postgres_catalog.DEFAULT_SCHEMA]
+
+    def _connection(self):
+        """
+        Get a connection context manager, from the pool if the source is pooled.
+        
+        Either way the transaction is committed (or rolled back on error) when
+        the block exits.
+        """
+        if self.pooled:
+            return pool.get_pool(self.conn_params).connection()
+        return psycopg.connect(**self.conn_params)
 
     def check_connection(self) -> bool:
         """
@@ -45,7 +84,7 @@ class PostgresSource:
             bool: True if connection is successful, False otherwise
         """
         try:
-            with psycopg.connect(**self.conn_params) as conn:
+            with self._connection() as conn:
                 with conn.cursor() as cur:
                     cur.execute("SELECT 1")
                     result = cur.fetchone()
@@ -62,15 +101,10 @@ class PostgresSource:
             List[str]: List of table names
         """
         try:
-            with psycopg.connect(**self.conn_params) as conn:
+            with self._connection() as conn:
                 with conn.cursor() as cur:
-                    cur.execute("""
-                        SELECT table_name 
-                        FROM information_schema.tables 
-                        WHERE table_schema = 'public'
-                        ORDER BY table_name
-                    """)
-                    tables = [table[0] for table in cur.fetchall()]
+                    cur.execute(postgres_catalog.TABLES_QUERY, {"schemas": self.schemas})
+                    tables = [postgres_catalog.qualified_name(*table) for table in cur.fetchall()]
                     return tables
         except Exception as e:
             print(f"Failed to fetch tables: {str(e)}")
@@ -81,13 +115,13 @@ class PostgresSource:
         Fetch all columns for a given table with their data types and constraints.
         
         Args:
-            table_name: Name of the table
+            table_name: Name of the table, schema-qualified outside public
             
         Returns:
             List[Dict[str, Any]]: List of column details including name, data type, nullable status, etc.
         """
         try:
-            with psycopg.connect(**self.conn_params) as conn:
+            with self._connection() as conn:
                 with conn.cursor() as cur:
                     query = """
                         SELECT 
@@ -99,12 +133,12 @@ class PostgresSource:
                         FROM 
                             information_schema.columns 
                         WHERE 
-                            table_schema = 'public' AND 
+                            table_schema = %s AND 
                             table_name = %s
                         ORDER BY 
                             ordinal_position
                     """
-                    cur.execute(query, (table_name,))
+                    cur.execute(query, postgres_catalog.split_qualified_name(table_name))
                     
                     columns = []
                     for col in cur.fetchall():
@@ -127,167 +161,66 @@ class PostgresSource:
         Returns:
             Dict[str, List[Dict[str, Any]]]: Dictionary with table names as keys and lists of column details as values
         """
-        result = {}
-        tables = self.fetch_tables()
-        for table in tables:
-            columns = self.fetch_columns(table)
-            result[table] = columns
-        return result
+        try:
+            with self._connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(postgres_catalog.TABLES_QUERY, {"schemas": self.schemas})
+                    result = {postgres_catalog.qualified_name(*table): [] for table in cur.fetchall()}
+                    cur.execute(postgres_catalog.COLUMNS_QUERY, {"schemas": self.schemas})
+                    for row in cur.fetchall():
+                        name = postgres_catalog.qualified_name(row[0], row[1])
+                        if name in result:
+                            result[name].append(postgres_catalog.column_details(row[2:]))
+                    return result
+        except Exception as e:
+            print(f"Failed to fetch tables with columns: {str(e)}")
+            return {}
+    
+    def fetch_catalog_fingerprint(self) -> Optional[str]:
+        """
+        Fetch a digest of the catalog that changes whenever a table, view,
+        index or column is created, altered or dropped.
+        
+        Returns:
+            Optional[str]: Fingerprint, or None if it could not be fetched
+        """
+        try:
+            with self._connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(postgres_catalog.FINGERPRINT_QUERY, {"schemas": self.schemas})
+                    return cur.fetchone()[0]
+        except Exception as e:
+            print(f"Failed to fetch catalog fingerprint: {str(e)}")
+            return None
     
     def fetch_schema(self) -> Dict[str, Any]:
         """
         Fetch the complete database schema including tables, columns, and constraints.
         
+        The catalog of every selected schema is read with a fixed number of
+        set-based queries, pipelined over a single connection (see
+        connector.postgres_catalog), independent of the number of tables.
+        
         Returns:
             Dict[str, Any]: Dictionary containing the database schema
         """
         try:
-            schema = {
-                "tables": {},
-                "views": {},
-                "functions": [],
-                "database_info": {}
-            }
-            
-            # Get database information
-            with psycopg.connect(**self.conn_params) as conn:
+            with self._connection() as conn:
                 with conn.cursor() as cur:
                     # Get database version
                     cur.execute("SELECT version()")
                     version = cur.fetchone()[0]
-                    schema["database_info"]["version"] = version
-                    
-                    # Get database name
-                    schema["database_info"]["name"] = self.database
                     
-                    # Get all tables with their columns
-                    tables = self.fetch_tables()
-                    for table_name in tables:
-                        columns = self.fetch_columns(table_name)
-                        
-                        # Get primary key information
-                        cur.execute("""
-                            SELECT 
-                                a.attname as column_name
-                            FROM 
-                                pg_index i
-                                JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
-                            WHERE
-                                i.indrelid = %s::regclass AND
-                                i.indisprimary;
-                        """, (table_name,))
-                        pk_columns = [row[0] for row in cur.fetchall()]
-                        
-                        # Get foreign key information
-                        cur.execute("""
-                            SELECT
-                                kcu.column_name,
-                                ccu.table_name AS foreign_table_name,
-                                ccu.column_name AS foreign_column_name
-                            FROM
-                                information_schema.table_constraints AS tc
-                                JOIN information_schema.key_column_usage AS kcu
-                                    ON tc.constraint_name = kcu.constraint_name
-                                    AND tc.table_schema = kcu.table_schema
-                                JOIN information_schema.constraint_column_usage AS ccu
-                                    ON ccu.constraint_name = tc.constraint_name
-                                    AND ccu.table_schema = tc.table_schema
-                            WHERE
-                                tc.constraint_type = 'FOREIGN KEY' AND
-                                tc.table_name = %s;
-                        """, (table_name,))
-                        foreign_keys = []
-                        for fk in cur.fetchall():
-                            foreign_keys.append({
-                                'column': fk[0],
-                                'references_table': fk[1],
-                                'references_column': fk[2]
-                            })
-                        
-                        # Get indexes
-                        cur.execute("""
-                            SELECT
-                                i.relname as index_name,
-                                a.attname as column_name,
-                                ix.indisunique as is_unique
-                            FROM
-                                pg_class t,
-                                pg_class i,
-                                pg_index ix,
-                                pg_attribute a
-                            WHERE
-                                t.oid = ix.indrelid
-                                AND i.oid = ix.indexrelid
-                                AND a.attrelid = t.oid
-                                AND a.attnum = ANY(ix.indkey)
-                                AND t.relkind = 'r'
-                                AND t.relname = %s
-                            ORDER BY
-                                i.relname, a.attnum;
-                        """, (table_name,))
-                        
-                        indexes = {}
-                        for idx_row in cur.fetchall():
-                            idx_name, col_name, is_unique = idx_row
-                            if idx_name not in indexes:
-                                indexes[idx_name] = {"columns": [], "unique": is_unique}
-                            indexes[idx_name]["columns"].append(col_name)
-                        
-                        # Get row count estimate
-                        cur.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", (table_name,))
-                        row_count = cur.fetchone()
-                        estimated_row_count = int(row_count[0]) if row_count and row_count[0] else 0
-                        
-                        # Combine all information
-                        schema["tables"][table_name] = {
-                            "name": table_name,
-                            "columns": columns,
-                            "primary_key": pk_columns,
-                            "foreign_keys": foreign_keys,
-                            "indexes": list(indexes.values()),
-                            "estimated_row_count": estimated_row_count
-                        }
+                    cur.execute(postgres_catalog.FINGERPRINT_QUERY, {"schemas": self.schemas})
+                    fingerprint = cur.fetchone()[0]
                     
-                    # Get views
-                    cur.execute("""
-                        SELECT 
-                            table_name as view_name, 
-                            view_definition
-                        FROM 
-                            information_schema.views
-                        WHERE 
-                            table_schema = 'public'
-                    """)
+                rows = postgres_catalog.fetch_catalog_rows(conn, self.schemas)
                     
-                    for view_row in cur.fetchall():
-                        view_name, view_def = view_row
-                        view_columns = self.fetch_columns(view_name)
-                        schema["views"][view_name] = {
-                            "name": view_name,
-                            "columns": view_columns,
-                            "definition": view_def
-                        }
-                    
-                    # Get functions
-                    cur.execute("""
-                        SELECT 
-                            p.proname as function_name,
-                            pg_get_functiondef(p.oid) as function_def
-                        FROM 
-                            pg_proc p
-                            JOIN pg_namespace n ON p.pronamespace = n.oid
-                        WHERE 
-                            n.nspname = 'public'
-                    """)
-                    
-                    for func_row in cur.fetchall():
-                        func_name, func_def = func_row
-                        schema["functions"].append({
-                            "name": func_name,
-                            "definition": func_def
-                        })
-                    
-            return schema
+            return postgres_catalog.assemble_schema(rows, {
+                "version": version,
+                "name": self.database,
+                "catalog_fingerprint": fingerprint
+            })
                     
         except Exception as e:
             print(f"Failed to fetch schema: {str(e)}")
@@ -305,7 +238,7 @@ class PostgresSource:
             List[Tuple]: Query results
         """
         try:
-            with psycopg.connect(**self.conn_params) as conn:
+            with self._connection() as conn:
                 with conn.cursor() as cur:
                     cur.execute(query, params or ())
                     if cur.description:  # Check if query returns data
@@ -314,4 +247,238 @@ class PostgresSource:
                         conn.commit()
                         return []
         except Exception as e:
-            raise e
\ No newline at end of file
+            raise e
+
+class AsyncPostgresSource:
+    """
+    Async counterpart of PostgresSource using psycopg3's AsyncConnection,
+    for callers running in an event loop (the API).
+    """
+    def __init__(
+        self,
+        host: str,
+        port: int = 5432,
+        database: str = "",
+        user: str = "",
+        password: str = "",
+        pooled: bool = False,
+        schemas: Optional[List[str]] = None
+    ):
+        """
+        Initialize connection parameters for PostgreSQL database.
+        
+        Args:
+            host: Database server host
+            port: Database server port (default: 5432)
+            database: Database name
+            user: Username for authentication
+            password: Password for authentication
+            pooled: Borrow connections from the event loop's pool of these
+                connection parameters instead of opening one per call
+            schemas: Schemas to introspect (default: public); relations
+                outside public are named schema-qualified
+        """
+        self.host = host
+        self.port = port
+        self.database = database
+        self.user = user
+        self.password = password
+        self.conn_params = {
+            "host": host,
+            "port": port,
+            "dbname": database,
+            "user": user,
+            "password": password
+        }
+        self.pooled = pooled
+        self.schemas = list(schemas) if schemas else [postgres_catalog.DEFAULT_SCHEMA]
+
+    @asynccontextmanager
+    async def _connection(self):
+        """Get a connection, from the pool if the source is pooled"""
+        if self.pooled:
+            async with (await pool.get_async_pool(self.conn_params)).connection() as conn:
+                yield conn
+        else:
+            async with await psycopg.AsyncConnection.connect(**self.conn_params) as conn:
+                yield conn
+
+    @asynccontextmanager
+    async def _stream_connection(self):
+        """Get a connection held for a whole streamed query, never one of the source's pool"""
+        if self.pooled:
+            async with (await pool.get_async_pool(self.conn_params, stream=True)).connection() as conn:
+                yield conn
+        else:
+            async with await psycopg.AsyncConnection.connect(**self.conn_params) as conn:
+                yield conn
+
+    async def check_connection(self) -> bool:
+        """
+        Check if the database connection is working.
+        
+        Returns:
+            bool: True if connection is successful, False otherwise
+        """
+        try:
+            async with self._connection() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute("SELECT 1")
+                    result = await cur.fetchone()
+                    return result[0] == 1
+        except Exception as e:
+            print(f"Connection check failed: {str(e)}")
+            return False
+
+    async def fetch_tables(self) -> List[str]:
+        """
+        Fetch all tables in the current database.
+        
+        Returns:
+            List[str]: List of table names
+        """
+        try:
+            async with self._connection() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute(postgres_catalog.TABLES_QUERY, {"schemas": self.schemas})
+                    return [postgres_catalog.qualified_name(*table) for table in await cur.fetchall()]
+        except Exception as e:
+            print(f"Failed to fetch tables: {str(e)}")
+            return []
+
+    async def fetch_columns(self, table_name: str) -> List[Dict[str, Any]]:
+        """
+        Fetch all columns for a given table with their data types and constraints.
+        
+        Args:
+            table_name: Name of the table, schema-qualified outside public
+            
+        Returns:
+            List[Dict[str, Any]]: List of column details including name, data type, nullable status, etc.
+        """
+        try:
+            async with self._connection() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute("""
+                        SELECT 
+                            column_name, 
+                            data_type, 
+                            character_maximum_length,
+                            is_nullable, 
+                            column_default
+                        FROM 
+                            information_schema.columns 
+                        WHERE 
+                            table_schema = %s AND 
+                            table_name = %s
+                        ORDER BY 
+                            ordinal_position
+                    """, postgres_catalog.split_qualified_name(table_name))
+                    return [postgres_catalog.column_details(col) for col in await cur.fetchall()]
+        except Exception as e:
+            print(f"Failed to fetch columns for table {table_name}: {str(e)}")
+            return []
+
+    async def fetch_schema(self) -> Dict[str, Any]:
+        """
+        Fetch the complete database schema including tables, columns, and constraints.
+        
+        Schemas are introspected in chunks, concurrently on separate connections.
+        
+        Returns:
+            Dict[str, Any]: Dictionary containing the database schema
+        """
+        async def fetch_database_info():
+            async with self._connection() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute("SELECT version()")
+                    version = (await cur.fetchone())[0]
+                    await cur.execute(postgres_catalog.FINGERPRINT_QUERY, {"schemas": self.schemas})
+                    fingerprint = (await cur.fetchone())[0]
+                    return version, fingerprint
+
+        try:
+            (version, fingerprint), rows = await asyncio.gather(
+                fetch_database_info(),
+                postgres_catalog.fetch_catalog_rows_concurrently(self._connection, self.schemas)
+            )
+            return postgres_catalog.assemble_schema(rows, {
+                "version": version,
+                "name": self.database,
+                "catalog_fingerprint": fingerprint
+            })
+                    
+        except Exception as e:
+            print(f"Failed to fetch schema: {str(e)}")
+            return {}
+
+    async def execute_query(self, query: str, params: Tuple = None) -> List[Tuple]:
+        """
+        Execute a SQL query and return results.
+        
+        Args:
+            query: SQL query string
+            params: Query parameters (optional)
+            
+        Returns:
+            List[Tuple]: Query results
+        """
+        async with self._connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(query, params or ())
+                if cur.description:  # Check if query returns data
+                    return await cur.fetchall()
+                else:
+                    await conn.commit()
+                    return []
+
+    async def stream_query(
+        self,
+        query: str,
+        params: Tuple = None,
+        max_rows: int = QUERY_STREAM_MAX_ROWS,
+        statement_timeout_ms: int = QUERY_STREAM_TIMEOUT_MS,
+        batch_size: int = QUERY_STREAM_BATCH_ROWS,
+        idle_timeout_ms: int = QUERY_STREAM_IDLE_TIMEOUT_MS
+    ) -> AsyncIterator[Tuple[List[str], List[Tuple]]]:
+        """
+        Execute a read-only query and yield its results in batches, without
+        holding the whole result in memory.
+        
+        The query runs in a READ ONLY transaction through a server-side cursor,
+        with a statement timeout, and stops after max_rows rows. The connection
+        is held until the results are consumed, so it comes from a separate
+        pool, and the transaction is ended by the server if it stays idle
+        longer than idle_timeout_ms.
+        
+        Args:
+            query: SQL query string
+            params: Query parameters (optional)
+            max_rows: Max rows to return
+            statement_timeout_ms: Statement timeout in milliseconds
+            batch_size: Rows fetched per round trip
+            idle_timeout_ms: Idle in transaction timeout in milliseconds
+            
+        Yields:
+            Tuple[List[str], List[Tuple]]: Column names and a batch of rows
+        """
+        async with self._stream_connection() as conn:
+            async with conn.transaction():
+                await conn.execute("SET TRANSACTION READ ONLY")
+                await conn.execute(
+                    "SELECT set_config('statement_timeout', %s, true), set_config('idle_in_transaction_session_timeout', %s, true)",
+                    [str(statement_timeout_ms), str(idle_timeout_ms)]
+                )
+                async with conn.cursor(name=f"pgsync_query_{uuid.uuid4().hex}") as cur:
+                    await cur.execute(query, params or ())
+                    columns = [desc[0] for desc in cur.description]
+                    remaining = max_rows
+                    while remaining > 0:
+                        rows = await cur.fetchmany(min(batch_size, remaining))
+                        if not rows:
+                            break
+                        remaining -= len(rows)
+                        yield columns, rows
+                    if remaining == max_rows:
+                        # Empty result: still report the columns
+                        yield columns, []
@@ -0,0 +1,229 @@
+import os
+import re
+import csv
+import decimal
+import datetime
+import logging
+
+from core import serialization
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Columnar spool formats need pyarrow
+    pa = None
+    pq = None
+
+logger = logging.getLogger("spool")
+
+# Spool formats and the file extension used for each
+SPOOL_FORMATS = {"json": "json", "parquet": "parquet", "arrow": "arrow"}
+
+# Extensions of spool files that can be read back as records
+READABLE_EXTENSIONS = ("json", "csv", "parquet", "arrow")
+
+# NULL marker of COPY CSV spool files, so that NULL and empty strings differ
+COPY_NULL = "\\N"
+
+def _base_type(pg_type):
+    # Drop type modifiers: varchar(10), numeric(10,2), timestamp(3) with time zone
+    return " ".join(re.sub(r"\(.*?\)", "", (pg_type or "").lower()).split())
+
+def arrow_type(pg_type):
+    """Map a PostgreSQL data type (as in information_schema) to an Arrow type"""
+    pg_type = _base_type(pg_type)
+    type_mapping = {
+        "smallint": pa.int16(),
+        "int2": pa.int16(),
+        "integer": pa.int32(),
+        "int4": pa.int32(),
+        "bigint": pa.int64(),
+        "int8": pa.int64(),
+        "real": pa.float32(),
+        "float4": pa.float32(),
+        "double precision": pa.float64(),
+        "float8": pa.float64(),
+        "boolean": pa.bool_(),
+        "bool": pa.bool_(),
+        "date": pa.date32(),
+        "timestamp": pa.timestamp("us"),
+        "timestamp without time zone": pa.timestamp("us"),
+        "timestamptz": pa.timestamp("us", tz="UTC"),
+        "timestamp with time zone": pa.timestamp("us", tz="UTC"),
+        "time": pa.time64("us"),
+        "time without time zone": pa.time64("us"),
+        "bytea": pa.binary(),
+    }
+    # numeric (unbounded precision), json, uuid, inet, arrays, ... are kept as strings
+    return type_mapping.get(pg_type, pa.string())
+
+def _parse_timestamp(value):
+    # fromisoformat before Python 3.11 needs 6 fractional digits and a +HH:MM offset
+    value = re.sub(r"\.(\d{1,5})(?=$|[+-])", lambda m: "." + m.group(1).ljust(6, "0"), value)
+    return datetime.datetime.fromisoformat(re.sub(r"([+-]\d\d)$", r"\1:00", value))
+
+def _csv_caster(pg_type):
+    """Callable converting COPY CSV text of a PostgreSQL type to the value psycopg returns"""
+    pg_type = _base_type(pg_type)
+    if pg_type in ("smallint", "int2", "integer", "int4", "bigint", "int8"):
+        return int
+    if pg_type in ("real", "float4", "double precision", "float8"):
+        return float
+    if pg_type in ("numeric", "decimal"):
+        return decimal.Decimal
+    if pg_type in ("boolean", "bool"):
+        return lambda value: value == "t"
+    if pg_type in ("json", "jsonb"):
+        return serialization.loads
+    if pg_type == "date":
+        return datetime.date.fromisoformat
+    if pg_type.startswith("timestamp"):
+        return _parse_timestamp
+    if pg_type == "bytea":
+        return lambda value: bytes.fromhex(value[2:])
+    # Text, uuid, time, arrays, ... are kept as COPY writes them
+    return None
+
+def _csv_value(value, caster):
+    if value == COPY_NULL:
+        return None
+    if caster is None:
+        return value
+    try:
+        return caster(value)
+    except (ValueError, decimal.InvalidOperation):
+        # infinity, BC dates, ...
+        return value
+
+def _read_csv(file_path, column_types=None):
+    column_types = column_types or {}
+    with open(file_path, "r", newline="") as f:
+        reader = csv.reader(f)
+        columns = next(reader, [])
+        casters = [_csv_caster(column_types[column]) if column in column_types else None for column in columns]
+        return [
+            {column: _csv_value(value, caster) for column, value, caster in zip(columns, row, casters)}
+            for row in reader
+        ]
+
+def _to_string(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list)):
+        return serialization.dumps_str(value)
+    return str(value)
+
+def _column_array(values, type_=None):
+    if type_ is not None and pa.types.is_string(type_):
+        return pa.array([_to_string(value) for value in values], type=type_)
+    # bytea comes back from psycopg as memoryview
+    values = [bytes(value) if isinstance(value, memoryview) else value for value in values]
+    if type_ is not None:
+        # A declared type is kept so that every batch of a table has the same schema
+        return pa.array(values, type=type_)
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, ValueError):
+        # Values whose type can't be inferred are kept as strings
+        return pa.array([_to_string(value) for value in values], type=pa.string())
+
+def _column_arrays(columns, column_values, column_types):
+    column_types = column_types or {}
+    return [
+        _column_array(values, arrow_type(column_types[column]) if column in column_types else None)
+        for column, values in zip(columns, column_values)
+    ]
+
+def arrow_schema(columns, column_types):
+    """Arrow schema of columns typed from a mapping of column name to PostgreSQL data type"""
+    return pa.schema([(column, arrow_type(column_types.get(column))) for column in columns])
+
+def record_batch_from_columns(columns, column_values, column_types=None):
+    """
+    Build a typed Arrow RecordBatch from column names and per-column values.
+
+    Args:
+        columns: Column names
+        column_values: One sequence of values per column, in the same order
+        column_types: Optional mapping of column name to PostgreSQL data type;
+            columns missing from it are inferred from the values, so batches
+            only share a schema when every column is listed
+    """
+    if pa is None:
+        raise ValueError("pyarrow is required for Arrow batches")
+    return pa.RecordBatch.from_arrays(_column_arrays(columns, column_values, column_types), names=columns)
+
+def to_arrow_table(data, column_types=None):
+    """
+    Build a typed Arrow table from a list of records.
+
+    Args:
+        data: List of records (dicts with the same keys)
+        column_types: Optional mapping of column name to PostgreSQL data type;
+            columns missing from it are inferred from the values
+    """
+    if pa is None:
+        raise ValueError("pyarrow is required for columnar spool formats")
+    columns = list(data[0].keys()) if data else list((column_types or {}).keys())
+    column_values = [[record.get(column) for record in data] for column in columns]
+    return pa.Table.from_arrays(_column_arrays(columns, column_values, column_types), names=columns)
+
+def is_arrow_batch(data):
+    """Whether data is an Arrow RecordBatch or Table rather than a list of records"""
+    return pa is not None and isinstance(data, (pa.RecordBatch, pa.Table))
+
+def write_batch(data, file_path, spool_format="json", column_types=None):
+    """
+    Write a batch of records to a spool file.
+
+    Parquet and Arrow IPC files are zstd-compressed and typed from column_types.
+    Arrow batches are written as they are.
+
+    Returns:
+        int: Bytes written
+    """
+    if spool_format == "json":
+        return serialization.dump(data.to_pylist() if is_arrow_batch(data) else data, file_path)
+
+    if pa is None:
+        raise ValueError("pyarrow is required for columnar spool formats")
+    if isinstance(data, pa.RecordBatch):
+        table = pa.Table.from_batches([data])
+    elif isinstance(data, pa.Table):
+        table = data
+    else:
+        table = to_arrow_table(data, column_types)
+    if spool_format == "parquet":
+        pq.write_table(table, file_path, compression="zstd")
+    elif spool_format == "arrow":
+        options = pa.ipc.IpcWriteOptions(compression="zstd")
+        with pa.OSFile(file_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema, options=options) as writer:
+                writer.write_table(table)
+    else:
+        raise ValueError(f"Unsupported spool format: {spool_format}")
+    return os.path.getsize(file_path)
+
+def read_batch(file_path, column_types=None):
+    """
+    Read a spool file back into a list of records, based on its extension.
+
+    Args:
+        file_path: Path to the spool file
+        column_types: Optional mapping of column name to PostgreSQL data type,
+            used to cast the text fields of COPY CSV files; other columns are
+            read as strings
+    """
+    extension = os.path.splitext(file_path)[1].lstrip(".")
+    if extension == "json":
+        return serialization.load(file_path)
+    if extension == "csv":
+        return _read_csv(file_path, column_types)
+    if extension in ("parquet", "arrow"):
+        if pa is None:
+            raise ValueError("pyarrow is required for columnar spool formats")
+        if extension == "parquet":
+            return pq.read_table(file_path).to_pylist()
+        with pa.memory_map(file_path, "r") as source:
+            return pa.ipc.open_file(source).read_all().to_pylist()
+    raise ValueError(f"Unsupported spool file: {file_path}")
@@ -1,67 +1,325 @@
+import os
 import uuid
-import json
+import numpy as np
+import pandas as pd
 from datetime import datetime, timezone
 from typing import List, Dict, Any, Optional
 
 from core.base import BaseTransformer
+from core import serialization
+from connector import spool
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    # Type of the _extracted_at and _loaded_at columns of Arrow batches (BigQuery TIMESTAMP)
+    ARROW_TIMESTAMP = pa.timestamp("us", tz="UTC")
+except ImportError:  # Arrow batches need pyarrow
+    pa = None
+    pc = None
+    ARROW_TIMESTAMP = None
+
+_HEX_DIGITS = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+# Positions of the 32 hex digits in the 36-character canonical UUID string
+_UUID_HEX_POSITIONS = np.array([i for i in range(36) if i not in (8, 13, 18, 23)])
+
+# JSON escapes of the control characters, as the serialization layer writes them
+_JSON_CONTROL_ESCAPES = {chr(i): serialization.dumps_str(chr(i))[1:-1] for i in range(0x20)}
+
+# Keys of the two 64-bit hashes making up a deterministic _raw_id (16 bytes each)
+_RAW_ID_HASH_KEYS = ("raw_id_hash_key1", "raw_id_hash_key2")
+
+def _uuid_buffer(raw: np.ndarray, version: int) -> bytes:
+    """Format a (count, 16) uint8 array as UUID strings of a version, in one contiguous ASCII buffer of 36 bytes each"""
+    count = len(raw)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | (version << 4)
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80  # RFC 4122 variant
+    digits = np.empty((count, 32), dtype=np.uint8)
+    digits[:, 0::2] = _HEX_DIGITS[raw >> 4]
+    digits[:, 1::2] = _HEX_DIGITS[raw & 0x0F]
+    text = np.full((count, 36), ord("-"), dtype=np.uint8)
+    text[:, _UUID_HEX_POSITIONS] = digits
+    return text.tobytes()
+
+def _uuid4_buffer(count: int) -> bytes:
+    """Generate count random UUID4 strings as one contiguous ASCII buffer of 36 bytes each"""
+    raw = np.frombuffer(os.urandom(16 * count), dtype=np.uint8).reshape(count, 16).copy()
+    return _uuid_buffer(raw, 4)
+
+def _key_strings(values: List[Any]) -> List[Optional[str]]:
+    """Normalize key values to strings, the same whether they come from the driver or a JSON spool file"""
+    values = serialization.loads(serialization.dumps(values))
+    return [value if value is None or isinstance(value, str) else str(value) for value in values]
+
+def _key_hash_buffer(key_values: List[List[Any]]) -> bytes:
+    """
+    Hash rows of key column values into deterministic UUID (version 8) strings,
+    as one contiguous ASCII buffer of 36 bytes each.
+
+    Args:
+        key_values: Values of each key column, all of the same length
+    """
+    frame = pd.DataFrame({i: _key_strings(values) for i, values in enumerate(key_values)}, dtype=object)
+    # Two 64-bit hashes with different keys give 128 bits (122 after the version and variant bits)
+    hashes = np.empty((len(frame), 2), dtype=">u8")
+    for i, hash_key in enumerate(_RAW_ID_HASH_KEYS):
+        hashes[:, i] = pd.util.hash_pandas_object(frame, index=False, hash_key=hash_key).to_numpy()
+    return _uuid_buffer(hashes.view(np.uint8), 8)
+
+def _uuid_strings(buffer: bytes) -> List[str]:
+    """Split a buffer of 36-byte UUID strings into a list of str"""
+    text = buffer.decode("ascii")
+    return [text[i:i + 36] for i in range(0, len(text), 36)]
+
+def _uuid_array(buffer: bytes):
+    """Wrap a buffer of 36-byte UUID strings as an Arrow string array without per-row Python objects"""
+    count = len(buffer) // 36
+    offsets = np.arange(0, 36 * (count + 1), 36, dtype=np.int32)
+    return pa.StringArray.from_buffers(count, pa.py_buffer(offsets), pa.py_buffer(buffer))
+
+# Columns of the raw format, in order
+RAW_COLUMNS = ["_raw_id", "_extracted_at", "_loaded_at", "_data", "_meta", "_generation_id"]
+
+# Metadata columns of the typed format, followed by the source columns
+TYPED_META_COLUMNS = ["_raw_id", "_extracted_at", "_loaded_at", "_meta", "_generation_id"]
+
+# PostgreSQL types whose values can be loaded as JSON objects rather than strings
+_JSON_TYPES = {"json", "jsonb"}
+
+def _check_typed_columns(columns: List[str]):
+    clashing = [column for column in columns if column in TYPED_META_COLUMNS]
+    if clashing:
+        raise ValueError(f"Source columns clash with metadata columns: {', '.join(clashing)}")
+
+
+def _json_string_array(values):
+    """JSON-encode an Arrow string array: escape and quote every value at once"""
+    escaped = pc.replace_substring(values, "\\", "\\\\")
+    escaped = pc.replace_substring(escaped, '"', '\\"')
+    if pc.any(pc.match_substring_regex(escaped, r"[\x00-\x1f]")).as_py():
+        for char, escape in _JSON_CONTROL_ESCAPES.items():
+            escaped = pc.replace_substring(escaped, char, escape)
+    return pc.binary_join_element_wise('"', escaped, '"', "")
+
+def _json_values(array):
+    """JSON text of each value of an Arrow array, as serialization.dumps_str writes it"""
+    type_ = array.type
+    if pa.types.is_boolean(type_) or pa.types.is_integer(type_):
+        fragments = pc.cast(array, pa.string())
+    elif pa.types.is_string(type_) or pa.types.is_large_string(type_):
+        fragments = _json_string_array(array.cast(pa.string()))
+    elif pa.types.is_date32(type_):
+        fragments = pc.binary_join_element_wise('"', pc.cast(array, pa.string()), '"', "")
+    else:
+        # Floats, timestamps, bytes, ... are formatted by the encoder, value by value
+        return pa.array([serialization.dumps_str(value) for value in array.to_pylist()], pa.string())
+    return pc.fill_null(fragments, "null")
+
+def _json_records(batch):
+    """JSON object of each row of an Arrow RecordBatch, built column by column"""
+    if batch.num_columns == 0:
+        return pa.repeat(pa.scalar("{}", pa.string()), batch.num_rows)
+    pieces = []
+    for i, name in enumerate(batch.schema.names):
+        pieces.append(("{" if i == 0 else ",") + serialization.dumps_str(name) + ":")
+        pieces.append(_json_values(batch.column(i)))
+    pieces.append("}")
+    return pc.binary_join_element_wise(*pieces, "")
 
 class Transformer(BaseTransformer):
     """
     Transforms extracted data into raw format.
     
     The raw format includes these fields:
-    - _raw_id: UUID for the record
+    - _raw_id: UUID for the record; random, or derived from the raw id
+      columns (primary key and cursor column) so reloads produce the same ids
     - _extracted_at: Timestamp when data was extracted
     - _loaded_at: Timestamp when data was loaded (initially null)
     - _data: JSON string containing the raw record data
     - _meta: Additional metadata (optional)
     - _generation_id: Generation identifier for this sync
+    
+    In typed output mode, `_data` is replaced by the source columns themselves,
+    so they can be loaded as typed destination columns.
     """
     
-    def __init__(self, generation_id: Optional[str] = None):
+    def __init__(
+        self,
+        generation_id: Optional[str] = None,
+        raw_id_columns: Optional[List[str]] = None,
+        output_mode: str = "raw",
+        column_types: Optional[Dict[str, str]] = None
+    ):
+        """
+        Args:
+            generation_id: Generation identifier (default: a new UUID)
+            raw_id_columns: Columns hashed into deterministic _raw_ids (default: random)
+            output_mode: "raw" (records as a `_data` JSON string) or "typed"
+                (source columns next to the metadata columns)
+            column_types: Source column -> PostgreSQL data type, fixing the
+                typed columns and their order (default: the batch's columns)
+        """
         super().__init__()
+        if output_mode not in ("raw", "typed"):
+            raise ValueError(f"Unsupported output mode: {output_mode}")
         self.generation_id = generation_id or str(uuid.uuid4())
+        self.raw_id_columns = raw_id_columns or None
+        self.output_mode = output_mode
+        self.column_types = column_types or None
+    
+    def _source_columns(self, available_columns) -> List[str]:
+        """Source columns of the typed format"""
+        columns = list(self.column_types) if self.column_types else list(available_columns)
+        _check_typed_columns(columns)
+        return columns
+    
+    def _encoded_columns(self, source_columns: List[str]) -> List[str]:
+        """Typed columns whose arrays and composites are encoded to JSON strings (all but JSON columns)"""
+        column_types = self.column_types or {}
+        return [
+            column for column in source_columns
+            if column_types.get(column) and column_types[column].lower() not in _JSON_TYPES
+        ]
+    
+    def _raw_id_buffer(self, count: int, available_columns, column_values) -> bytes:
+        """Build the _raw_ids of a batch, hashing the raw id columns if set"""
+        if not self.raw_id_columns:
+            return _uuid4_buffer(count)
+        missing = [column for column in self.raw_id_columns if column not in available_columns]
+        if count and missing:
+            raise ValueError(f"Raw id columns missing from the batch: {', '.join(missing)}")
+        return _key_hash_buffer([column_values(column) for column in self.raw_id_columns])
         
     def transform(self, data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Transform a list of records into raw format.
         
+        The constant values are encoded once per batch and the `_raw_id`s are
+        generated or hashed in bulk; only `_data` is encoded per record.
+        
         Args:
             data: List of records to transform
             
         Returns:
-            List of transformed records in raw format
+            List of transformed records in raw format, or in typed mode with
+            the TYPED_META_COLUMNS followed by the source columns
         """
-        transformed_data = []
         extracted_at = datetime.now(timezone.utc).isoformat()
+        meta = serialization.dumps_str({"source_timestamp": extracted_at})
+        generation_id = self.generation_id
+        raw_ids = _uuid_strings(self._raw_id_buffer(
+            len(data),
+            data[0].keys() if data else (),
+            lambda column: [record.get(column) for record in data]
+        ))
         
-        for record in data:
-            transformed_record = {
-                "_raw_id": str(uuid.uuid4()),
-                "_extracted_at": extracted_at,
-                "_loaded_at": None,  # Will be set during load
-                "_data": json.dumps(record),  # Store original record as JSON string
-                "_meta": json.dumps({"source_timestamp": extracted_at}),
-                "_generation_id": self.generation_id
-            }
-            transformed_data.append(transformed_record)
+        if self.output_mode == "typed":
+            source_columns = self._source_columns(data[0].keys() if data else ())
+            transformed_data = [
+                {
+                    "_raw_id": raw_id,
+                    "_extracted_at": extracted_at,
+                    "_loaded_at": None,  # Will be set during load
+                    "_meta": meta,
+                    "_generation_id": generation_id,
+                    **{column: record.get(column) for column in source_columns}
+                }
+                for raw_id, record in zip(raw_ids, data)
+            ]
+            for column in self._encoded_columns(source_columns):
+                for record in transformed_data:
+                    value = record[column]
+                    if isinstance(value, (list, dict)):
+                        record[column] = serialization.dumps_str(value)
+        else:
+            dumps_str = serialization.dumps_str
+            transformed_data = [
+                {
+                    "_raw_id": raw_id,
+                    "_extracted_at": extracted_at,
+                    "_loaded_at": None,  # Will be set during load
+                    "_data": dumps_str(record),  # Store original record as JSON string
+                    "_meta": meta,
+                    "_generation_id": generation_id
+                }
+                for raw_id, record in zip(raw_ids, data)
+            ]
             
         self.logger.info(f"Transformed {len(data)} records into Airbyte format")
         return transformed_data
     
+    def transform_arrow(self, batch):
+        """
+        Transform an Arrow RecordBatch into raw format with column-wise operations.
+        
+        The metadata columns are built once per batch. Columns have the same
+        types as in the records path, so both can load into one table: `_data`
+        is a JSON string and the timestamps are timestamps. `_data` is built
+        column by column, with Arrow compute for integer, boolean, string and
+        date columns; other columns are still encoded value by value. In typed
+        mode the source columns are kept, without copying, as top-level
+        columns instead.
+        
+        Args:
+            batch: Arrow RecordBatch of extracted records
+            
+        Returns:
+            Arrow RecordBatch in raw (or typed) format
+        """
+        if pa is None:
+            raise ValueError("pyarrow is required for Arrow batches")
+        count = batch.num_rows
+        now = datetime.now(timezone.utc)
+        extracted_at = now.isoformat()
+        meta = serialization.dumps_str({"source_timestamp": extracted_at})
+        raw_ids = self._raw_id_buffer(
+            count,
+            batch.schema.names,
+            lambda column: batch.column(batch.schema.get_field_index(column)).to_pylist()
+        )
+        
+        raw_id_array = _uuid_array(raw_ids)
+        extracted_at_array = pa.repeat(pa.scalar(now, ARROW_TIMESTAMP), count)
+        loaded_at_array = pa.nulls(count, ARROW_TIMESTAMP)  # Will be set during load
+        meta_array = pa.repeat(pa.scalar(meta, pa.string()), count)
+        generation_id_array = pa.repeat(pa.scalar(self.generation_id, pa.string()), count)
+        
+        if self.output_mode == "typed":
+            # Arrow columns already carry their types; keep every batch column
+            source_columns = batch.schema.names
+            _check_typed_columns(source_columns)
+            transformed = pa.RecordBatch.from_arrays(
+                [raw_id_array, extracted_at_array, loaded_at_array, meta_array, generation_id_array] + batch.columns,
+                names=TYPED_META_COLUMNS + source_columns
+            )
+        else:
+            transformed = pa.RecordBatch.from_arrays(
+                [
+                    raw_id_array,
+                    extracted_at_array,
+                    loaded_at_array,
+                    _json_records(batch),  # Original record as JSON string
+                    meta_array,
+                    generation_id_array
+                ],
+                names=RAW_COLUMNS
+            )
+        
+        self.logger.info(f"Transformed {count} records into raw format (Arrow)")
+        return transformed
+    
     def transform_batch_from_file(self, file_path: str) -> List[Dict[str, Any]]:
         """
         Read a batch file and transform its contents into raw format.
         
         Args:
-            file_path: Path to the JSON file containing records
+            file_path: Path to a spool file (JSON, COPY CSV, Parquet or Arrow IPC)
             
         Returns:
             List of transformed records in raw format
         """
         try:
-            with open(file_path, 'r') as f:
-                data = json.load(f)
+            data = spool.read_batch(file_path, self.column_types)
                 
             return self.transform(data)
         except Exception as e:
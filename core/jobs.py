@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from typing import Any, Optional, Dict
+from typing import Any, Optional, Dict, List
 from dataclasses import dataclass, field, asdict
 
 @dataclass
@@ -11,6 +11,14 @@ class ExtractJob:
     cursor_column: Optional[str] = None
     cursor_value: Any = None
     batch_size: int = 1000
+    extract_mode: str = "keyset"  # keyset, stream or copy
+    copy_format: str = "csv"  # csv (copy mode only)
+    parallelism: int = 1  # Number of concurrent range scans for a single table
+    sync_table_id: Optional[int] = None  # Sync table whose watermark this job advances
+    spool_format: str = "json"  # json, parquet or arrow
+    column_types: Optional[Dict[str, str]] = None  # Source column -> PostgreSQL data type
+    raw_id_columns: Optional[List[str]] = None  # Columns hashed into a deterministic _raw_id (random when None)
+    output_mode: str = "raw"  # raw (records as a _data JSON string) or typed (source columns)
     status: str = "pending"
     error: Optional[str] = None
     created_at: str = field(default_factory=lambda: datetime.now().isoformat())
@@ -0,0 +1,90 @@
+import json
+import uuid
+import base64
+import decimal
+import datetime
+import ipaddress
+
+try:
+    import orjson
+except ImportError:  # Fall back to the (slower) standard library encoder
+    orjson = None
+
+# Python type -> callable returning a JSON-native value
+_ENCODERS = {}
+
+def register_encoder(type_, encoder):
+    """
+    Register how values of a type (and its subclasses) are encoded to JSON.
+
+    Args:
+        type_: Python type as returned by the PostgreSQL driver
+        encoder: Callable converting a value to a JSON-native value
+    """
+    _ENCODERS[type_] = encoder
+
+def _default(obj):
+    for cls in type(obj).__mro__:
+        encoder = _ENCODERS.get(cls)
+        if encoder is not None:
+            return encoder(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _encode_bytes(value):
+    # BigQuery expects BYTES as base64 in JSON
+    return base64.b64encode(value).decode("ascii")
+
+# PostgreSQL types psycopg returns that JSON can't represent natively
+register_encoder(decimal.Decimal, str)  # numeric: keep full precision
+register_encoder(uuid.UUID, str)
+register_encoder(datetime.datetime, lambda value: value.isoformat())
+register_encoder(datetime.date, lambda value: value.isoformat())
+register_encoder(datetime.time, lambda value: value.isoformat())
+register_encoder(datetime.timedelta, str)  # interval
+register_encoder(bytes, _encode_bytes)  # bytea
+register_encoder(bytearray, _encode_bytes)
+register_encoder(memoryview, lambda value: _encode_bytes(value.tobytes()))
+register_encoder(ipaddress.IPv4Address, str)  # inet
+register_encoder(ipaddress.IPv6Address, str)
+register_encoder(ipaddress.IPv4Interface, str)
+register_encoder(ipaddress.IPv6Interface, str)
+register_encoder(ipaddress.IPv4Network, str)  # cidr
+register_encoder(ipaddress.IPv6Network, str)
+register_encoder(set, list)
+register_encoder(frozenset, list)
+
+def dumps(obj) -> bytes:
+    """Serialize obj to JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_default, separators=(",", ":")).encode()
+
+def dumps_str(obj) -> str:
+    """Serialize obj to a JSON string"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj, default=_default, separators=(",", ":"))
+
+def loads(data):
+    """Deserialize JSON from bytes or str"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dump(obj, file_path):
+    """Write obj as a JSON document to file_path and return the bytes written"""
+    data = dumps(obj)
+    with open(file_path, "wb") as f:
+        f.write(data)
+    return len(data)
+
+def load(file_path):
+    """Read a JSON document from file_path"""
+    with open(file_path, "rb") as f:
+        return loads(f.read())
+
+def dump_ndjson(records, fp):
+    """Write records as newline-delimited JSON to a binary file object"""
+    for record in records:
+        fp.write(dumps(record))
+        fp.write(b"\n")
@@ -1,4 +1,5 @@
 from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
 from models.api import StatusResponse
 from route.sources import router as sources_router
 from route.extractions import router as extractions_router
@@ -6,9 +7,11 @@ from route.sync_tables import router as sync_tables_router
 from route.connections import router as connections_router
 from route.destinations import router as destinations_router
 from route.jobs import router as jobs_router
+from route.schema_search import router as schema_search_router
 from sqlalchemy import text
 from session_manager import engine, get_db_session
 from worker.redis_client import RedisClient
+from connector.pool import close_all_pools, close_async_pools
 from config import REDIS_HOST, REDIS_PORT, REDIS_DB, REDIS_PASSWORD
 import logging
 import sys
@@ -27,6 +30,9 @@ app = FastAPI(
     version="1.0.0",
 )
 
+# Compress large responses (schemas, diffs) for clients sending Accept-Encoding: gzip
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
 # Register routers
 app.include_router(sources_router)
 app.include_router(extractions_router)
@@ -34,6 +40,13 @@ app.include_router(sync_tables_router)
 app.include_router(connections_router)
 app.include_router(destinations_router)
 app.include_router(jobs_router)
+app.include_router(schema_search_router)
+
+@app.on_event("shutdown")
+async def close_source_pools():
+    """Close pooled source connections"""
+    await close_async_pools()
+    close_all_pools()
 
 @app.get("/", response_model=StatusResponse)
 def root():
@@ -0,0 +1,42 @@
+"""add sync states
+
+Revision ID: 4b9e1f3a7c2d
+Revises: c07f2d06f6b3
+Create Date: 2026-10-17 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b9e1f3a7c2d'
+down_revision: Union[str, None] = 'c07f2d06f6b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('sync_states',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('sync_table_id', sa.Integer(), nullable=False),
+    sa.Column('use_ctid', sa.Boolean(), nullable=True),
+    sa.Column('cursor_column', sa.String(length=100), nullable=True),
+    sa.Column('cursor_value', sa.Text(), nullable=True),
+    sa.Column('extract_job_id', sa.String(length=36), nullable=True),
+    sa.Column('records_synced', sa.Integer(), nullable=True),
+    sa.Column('committed_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['sync_table_id'], ['sync_tables.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('sync_table_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('sync_states')
@@ -0,0 +1,28 @@
+"""add source schemas
+
+Revision ID: 5e7a3c9d1b28
+Revises: 8d2c6a5e0f14
+Create Date: 2026-10-17 11:42:08.215634
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e7a3c9d1b28'
+down_revision: Union[str, None] = '8d2c6a5e0f14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('sources', sa.Column('schemas', sa.JSON(), server_default=sa.text("'[\"public\"]'"), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('sources', 'schemas')
@@ -0,0 +1,28 @@
+"""add sync table spool format
+
+Revision ID: 8d2c6a5e0f14
+Revises: 4b9e1f3a7c2d
+Create Date: 2026-10-17 10:03:27.540912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2c6a5e0f14'
+down_revision: Union[str, None] = '4b9e1f3a7c2d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('sync_tables', sa.Column('spool_format', sa.String(length=20), server_default='json', nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('sync_tables', 'spool_format')
@@ -0,0 +1,123 @@
+"""add schema blobs
+
+Revision ID: a3f18c6e2d47
+Revises: 5e7a3c9d1b28
+Create Date: 2026-10-17 12:26:51.083317
+
+"""
+import json
+import hashlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f18c6e2d47'
+down_revision: Union[str, None] = '5e7a3c9d1b28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+schema_blobs = sa.table(
+    'schema_blobs',
+    sa.column('hash', sa.String),
+    sa.column('schema', sa.JSON)
+)
+
+schema_versions = sa.table(
+    'schema_versions',
+    sa.column('id', sa.String),
+    sa.column('schema', sa.JSON),
+    sa.column('table_hashes', sa.JSON),
+    sa.column('hash', sa.String)
+)
+
+
+# Frozen copy of the models.schema_store hashing, so that the migration keeps
+# producing the same blobs and hashes as the app changes. Version hashes leave
+# out the keys that change without the structure changing, like the runtime
+# hash does, so a backfilled version matches a fresh fetch of the same schema.
+VOLATILE_KEYS = ("row_estimates", "database_info")
+
+
+def content_hash(obj):
+    return hashlib.sha256(json.dumps(obj, sort_keys=True).encode()).hexdigest()
+
+
+def split_schema(schema):
+    rest = {key: value for key, value in schema.items() if key != "tables"}
+    rest["row_estimates"] = {}
+    blobs = {}
+    table_hashes = {}
+    for name, table in schema.get("tables", {}).items():
+        blob = {key: value for key, value in table.items() if key != "estimated_row_count"}
+        blob_hash = content_hash(blob)
+        blobs[blob_hash] = blob
+        table_hashes[name] = blob_hash
+        rest["row_estimates"][name] = table.get("estimated_row_count", 0)
+    return rest, blobs, table_hashes
+
+
+def version_hash(rest, table_hashes):
+    stable = {key: value for key, value in rest.items() if key not in VOLATILE_KEYS}
+    return content_hash({"schema": stable, "table_hashes": table_hashes})
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('schema_blobs',
+    sa.Column('hash', sa.String(length=64), nullable=False),
+    sa.Column('schema', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('hash')
+    )
+    op.add_column('schema_versions', sa.Column('table_hashes', sa.JSON(), nullable=True))
+
+    # Move the tables of existing versions into blobs, one version at a time
+    conn = op.get_bind()
+    version_ids = [row[0] for row in conn.execute(sa.select(schema_versions.c.id))]
+    for version_id in version_ids:
+        schema = conn.execute(
+            sa.select(schema_versions.c.schema).where(schema_versions.c.id == version_id)
+        ).scalar()
+        rest, blobs, table_hashes = split_schema(schema or {})
+        if blobs:
+            conn.execute(
+                postgresql.insert(schema_blobs)
+                .values([{"hash": blob_hash, "schema": blob} for blob_hash, blob in blobs.items()])
+                .on_conflict_do_nothing(index_elements=["hash"])
+            )
+        conn.execute(
+            schema_versions.update()
+            .where(schema_versions.c.id == version_id)
+            .values(schema=rest, table_hashes=table_hashes, hash=version_hash(rest, table_hashes))
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Inline the tables of every version again
+    conn = op.get_bind()
+    rows = conn.execute(
+        sa.select(schema_versions.c.id).where(schema_versions.c.table_hashes.isnot(None))
+    ).fetchall()
+    for (version_id,) in rows:
+        schema, table_hashes = conn.execute(
+            sa.select(schema_versions.c.schema, schema_versions.c.table_hashes).where(schema_versions.c.id == version_id)
+        ).one()
+        blobs = dict(conn.execute(
+            sa.select(schema_blobs.c.hash, schema_blobs.c.schema).where(schema_blobs.c.hash.in_(list(table_hashes.values())))
+        ).fetchall())
+        row_estimates = schema.pop("row_estimates", {})
+        schema["tables"] = {
+            name: {**blobs[blob_hash], "estimated_row_count": row_estimates.get(name, 0)}
+            for name, blob_hash in table_hashes.items()
+            if blob_hash in blobs
+        }
+        conn.execute(schema_versions.update().where(schema_versions.c.id == version_id).values(schema=schema))
+
+    op.drop_column('schema_versions', 'table_hashes')
+    op.drop_table('schema_blobs')
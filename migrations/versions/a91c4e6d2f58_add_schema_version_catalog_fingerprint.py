@@ -0,0 +1,53 @@
+"""add schema version catalog fingerprint
+
+Revision ID: a91c4e6d2f58
+Revises: f3a86b1c9d20
+Create Date: 2026-10-17 17:42:36.215094
+
+"""
+import json
+import zlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a91c4e6d2f58'
+down_revision: Union[str, None] = 'f3a86b1c9d20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+schema_versions = sa.table(
+    'schema_versions',
+    sa.column('id', sa.String),
+    sa.column('schema', sa.LargeBinary),
+    sa.column('catalog_fingerprint', sa.String)
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('schema_versions', sa.Column('catalog_fingerprint', sa.String(length=32), nullable=True))
+
+    # Copy the fingerprint out of the compressed schemas, one version at a time
+    conn = op.get_bind()
+    version_ids = [row[0] for row in conn.execute(sa.select(schema_versions.c.id))]
+    for version_id in version_ids:
+        data = conn.execute(
+            sa.select(schema_versions.c.schema).where(schema_versions.c.id == version_id)
+        ).scalar()
+        fingerprint = json.loads(zlib.decompress(data)).get("database_info", {}).get("catalog_fingerprint")
+        if fingerprint is not None:
+            conn.execute(
+                schema_versions.update()
+                .where(schema_versions.c.id == version_id)
+                .values(catalog_fingerprint=fingerprint)
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('schema_versions', 'catalog_fingerprint')
@@ -0,0 +1,112 @@
+"""compress schema columns
+
+Revision ID: b92d4e07c5a1
+Revises: a3f18c6e2d47
+Create Date: 2026-10-17 13:05:12.774290
+
+"""
+import os
+import json
+import zlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b92d4e07c5a1'
+down_revision: Union[str, None] = 'a3f18c6e2d47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Frozen copy of the models.database helpers as of this revision; the stored
+# values are plain JSON, so the standard library encoder is enough
+def compress_json(value):
+    level = int(os.getenv("JSON_COMPRESSION_LEVEL", 6))
+    return zlib.compress(json.dumps(value, separators=(",", ":")).encode(), level)
+
+
+def decompress_json(data):
+    return json.loads(zlib.decompress(data))
+
+
+def _convert(conn, table_name, key_column, convert):
+    """Rewrite schema into schema_new row by row"""
+    table = sa.table(
+        table_name,
+        sa.column(key_column, sa.String),
+        sa.column('schema', sa.JSON),
+        sa.column('schema_new', sa.LargeBinary)
+    )
+    keys = [row[0] for row in conn.execute(sa.select(table.c[key_column]))]
+    for key in keys:
+        value = conn.execute(sa.select(table.c.schema).where(table.c[key_column] == key)).scalar()
+        conn.execute(table.update().where(table.c[key_column] == key).values(schema_new=convert(value)))
+
+
+def _swap_column(table_name, type_):
+    op.drop_column(table_name, 'schema')
+    op.alter_column(table_name, 'schema_new', new_column_name='schema', existing_type=type_, nullable=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    op.add_column('schema_versions', sa.Column('row_estimates', sa.JSON(), nullable=True))
+
+    # Move row estimates out of the version schemas
+    versions = sa.table(
+        'schema_versions',
+        sa.column('id', sa.String),
+        sa.column('schema', sa.JSON),
+        sa.column('table_hashes', sa.JSON),
+        sa.column('row_estimates', sa.JSON)
+    )
+    version_ids = [row[0] for row in conn.execute(
+        sa.select(versions.c.id).where(versions.c.table_hashes.isnot(None))
+    )]
+    for version_id in version_ids:
+        schema = conn.execute(sa.select(versions.c.schema).where(versions.c.id == version_id)).scalar()
+        row_estimates = schema.pop("row_estimates", {})
+        conn.execute(
+            versions.update().where(versions.c.id == version_id).values(schema=schema, row_estimates=row_estimates)
+        )
+
+    for table_name, key_column in (('schema_versions', 'id'), ('schema_blobs', 'hash')):
+        op.add_column(table_name, sa.Column('schema_new', sa.LargeBinary(), nullable=True))
+        _convert(conn, table_name, key_column, compress_json)
+        _swap_column(table_name, sa.LargeBinary())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    conn = op.get_bind()
+    for table_name, key_column in (('schema_versions', 'id'), ('schema_blobs', 'hash')):
+        op.add_column(table_name, sa.Column('schema_new', sa.JSON(), nullable=True))
+        table = sa.table(
+            table_name,
+            sa.column(key_column, sa.String),
+            sa.column('schema', sa.LargeBinary),
+            sa.column('schema_new', sa.JSON)
+        )
+        keys = [row[0] for row in conn.execute(sa.select(table.c[key_column]))]
+        for key in keys:
+            value = conn.execute(sa.select(table.c.schema).where(table.c[key_column] == key)).scalar()
+            conn.execute(table.update().where(table.c[key_column] == key).values(schema_new=decompress_json(value)))
+        _swap_column(table_name, sa.JSON())
+
+    # Put row estimates back into the version schemas
+    versions = sa.table(
+        'schema_versions',
+        sa.column('id', sa.String),
+        sa.column('schema', sa.JSON),
+        sa.column('row_estimates', sa.JSON)
+    )
+    rows = conn.execute(sa.select(versions.c.id, versions.c.row_estimates).where(versions.c.row_estimates.isnot(None))).fetchall()
+    for version_id, row_estimates in rows:
+        schema = conn.execute(sa.select(versions.c.schema).where(versions.c.id == version_id)).scalar()
+        schema["row_estimates"] = row_estimates
+        conn.execute(versions.update().where(versions.c.id == version_id).values(schema=schema))
+    op.drop_column('schema_versions', 'row_estimates')
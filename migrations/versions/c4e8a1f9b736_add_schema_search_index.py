@@ -0,0 +1,47 @@
+"""add schema search index
+
+Revision ID: c4e8a1f9b736
+Revises: b92d4e07c5a1
+Create Date: 2026-10-17 13:48:37.902615
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8a1f9b736'
+down_revision: Union[str, None] = 'b92d4e07c5a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('schema_search_index',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('source_id', sa.Integer(), nullable=False),
+    sa.Column('table_name', sa.String(length=255), nullable=False),
+    sa.Column('column_name', sa.String(length=255), nullable=True),
+    sa.Column('data_type', sa.String(length=100), nullable=True),
+    sa.ForeignKeyConstraint(['source_id'], ['sources.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_schema_search_index_source_id'), 'schema_search_index', ['source_id'], unique=False)
+
+    # Trigram indexes serve both prefix and substring ILIKE searches
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index('ix_schema_search_index_table_name_trgm', 'schema_search_index', ['table_name'],
+                    postgresql_using='gin', postgresql_ops={'table_name': 'gin_trgm_ops'})
+    op.create_index('ix_schema_search_index_column_name_trgm', 'schema_search_index', ['column_name'],
+                    postgresql_using='gin', postgresql_ops={'column_name': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_schema_search_index_column_name_trgm', table_name='schema_search_index')
+    op.drop_index('ix_schema_search_index_table_name_trgm', table_name='schema_search_index')
+    op.drop_index(op.f('ix_schema_search_index_source_id'), table_name='schema_search_index')
+    op.drop_table('schema_search_index')
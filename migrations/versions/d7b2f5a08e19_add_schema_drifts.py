@@ -0,0 +1,41 @@
+"""add schema drifts
+
+Revision ID: d7b2f5a08e19
+Revises: c4e8a1f9b736
+Create Date: 2026-10-17 14:21:09.318564
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7b2f5a08e19'
+down_revision: Union[str, None] = 'c4e8a1f9b736'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('schema_drifts',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('source_id', sa.Integer(), nullable=False),
+    sa.Column('schema_version_id', sa.String(length=36), nullable=False),
+    sa.Column('previous_version', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('diff', sa.JSON(), nullable=False),
+    sa.Column('detected_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['source_id'], ['sources.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['schema_version_id'], ['schema_versions.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_schema_drifts_source_id'), 'schema_drifts', ['source_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_schema_drifts_source_id'), table_name='schema_drifts')
+    op.drop_table('schema_drifts')
@@ -0,0 +1,28 @@
+"""add sync table raw id mode
+
+Revision ID: e5c91d3b6a72
+Revises: d7b2f5a08e19
+Create Date: 2026-10-17 14:52:40.127395
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5c91d3b6a72'
+down_revision: Union[str, None] = 'd7b2f5a08e19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('sync_tables', sa.Column('raw_id_mode', sa.String(length=20), server_default='random', nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('sync_tables', 'raw_id_mode')
@@ -0,0 +1,28 @@
+"""add sync table output mode
+
+Revision ID: f3a86b1c9d20
+Revises: e5c91d3b6a72
+Create Date: 2026-10-17 15:24:18.602931
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a86b1c9d20'
+down_revision: Union[str, None] = 'e5c91d3b6a72'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('sync_tables', sa.Column('output_mode', sa.String(length=20), server_default='raw', nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('sync_tables', 'output_mode')
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Literal
 
 # Models for request and response
 class ConnectionInfo(BaseModel):
@@ -12,6 +12,7 @@ class ConnectionInfo(BaseModel):
 class QueryRequest(BaseModel):
     query: str
     params: Optional[List[Any]] = None
+    max_rows: Optional[int] = Field(None, ge=1)  # Capped by QUERY_STREAM_MAX_ROWS
 
 class StatusResponse(BaseModel):
     status: str
@@ -44,6 +45,7 @@ class SourceCreate(BaseModel):
     database: str
     user: str
     password: str
+    schemas: List[str] = Field(default_factory=lambda: ["public"], min_length=1)
 
 class SourceUpdate(BaseModel):
     name: Optional[str] = None
@@ -52,6 +54,7 @@ class SourceUpdate(BaseModel):
     database: Optional[str] = None
     user: Optional[str] = None
     password: Optional[str] = None
+    schemas: Optional[List[str]] = Field(None, min_length=1)
     is_active: Optional[bool] = None
 
 class SourceResponse(BaseModel):
@@ -61,6 +64,7 @@ class SourceResponse(BaseModel):
     port: int
     database: str
     user: str
+    schemas: List[str]
     is_active: bool
     created_at: str
     updated_at: str
@@ -72,6 +76,9 @@ class ExtractJobCreate(BaseModel):
     cursor_column: str
     cursor_value: Optional[Any] = None
     batch_size: int = 1000
+    extract_mode: Literal["keyset", "stream", "copy"] = "keyset"
+    copy_format: Literal["csv"] = "csv"
+    parallelism: int = Field(1, ge=1, le=32)
 
 class ExtractJobResponse(BaseModel):
     id: str
@@ -108,12 +115,27 @@ class SyncTableCreate(BaseModel):
     is_active: bool = True
     batch_size: int = Field(1000, ge=100, le=10000)
     sync_interval: int = Field(60, ge=5, le=1440)  # 5 min to 24 hours
+    spool_format: Literal["json", "parquet", "arrow"] = "json"
+    raw_id_mode: Literal["random", "primary_key"] = "random"
+    output_mode: Literal["raw", "typed"] = "raw"
 
 class SyncTableUpdate(BaseModel):
     is_active: Optional[bool] = None
     cursor_column: Optional[str] = None
     batch_size: Optional[int] = Field(None, ge=100, le=10000)
     sync_interval: Optional[int] = Field(None, ge=5, le=1440)
+    spool_format: Optional[Literal["json", "parquet", "arrow"]] = None
+    raw_id_mode: Optional[Literal["random", "primary_key"]] = None
+    output_mode: Optional[Literal["raw", "typed"]] = None
+
+class SyncStateResponse(BaseModel):
+    sync_table_id: int
+    use_ctid: bool
+    cursor_column: Optional[str] = None
+    cursor_value: Optional[str] = None
+    extract_job_id: Optional[str] = None
+    records_synced: int
+    committed_at: Optional[str] = None
 
 class SyncTableResponse(BaseModel):
     id: int
@@ -124,6 +146,17 @@ class SyncTableResponse(BaseModel):
     cursor_column: str
     batch_size: int
     sync_interval: int
+    spool_format: Optional[str] = "json"
+    raw_id_mode: Optional[str] = "random"
+    output_mode: Optional[str] = "raw"
     last_synced_at: Optional[str] = None
     created_at: str
     updated_at: str
+
+# Schema search models
+class SchemaSearchResult(BaseModel):
+    source_id: int
+    source_name: str
+    table_name: str
+    column_name: Optional[str] = None
+    data_type: Optional[str] = None
@@ -1,12 +1,39 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, JSON, UniqueConstraint, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, JSON, UniqueConstraint, Enum, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, backref, deferred
+from sqlalchemy.types import TypeDecorator
+import os
 import uuid
 import enum
+import zlib
+
+from core import serialization
 
 Base = declarative_base()
 
+# zlib level of CompressedJSON columns
+JSON_COMPRESSION_LEVEL = int(os.getenv("JSON_COMPRESSION_LEVEL", 6))
+
+def compress_json(value):
+    """Encode a value as zlib-compressed JSON"""
+    return zlib.compress(serialization.dumps(value), JSON_COMPRESSION_LEVEL)
+
+def decompress_json(data):
+    """Decode zlib-compressed JSON"""
+    return serialization.loads(zlib.decompress(data))
+
+class CompressedJSON(TypeDecorator):
+    """JSON stored zlib-compressed in a binary column"""
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return compress_json(value) if value is not None else None
+
+    def process_result_value(self, value, dialect):
+        return decompress_json(value) if value is not None else None
+
 class Source(Base):
     __tablename__ = "sources"
     
@@ -17,6 +44,7 @@ class Source(Base):
     database = Column(String(100), nullable=False)
     user = Column(String(100), nullable=False)
     password = Column(String(255), nullable=False)
+    schemas = Column(JSON, default=lambda: ["public"])  # Schemas introspected and synced
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
@@ -33,6 +61,7 @@ class Source(Base):
             "port": self.port,
             "database": self.database,
             "user": self.user,
+            "schemas": self.schemas or ["public"],
             "is_active": self.is_active,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None
@@ -43,8 +72,12 @@ class SchemaVersion(Base):
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     source_id = Column(Integer, ForeignKey("sources.id"), nullable=False)
-    schema = Column(JSON, nullable=False)  # The schema in JSON format
+    # Large columns are only loaded when accessed; see models.schema_store for projections
+    schema = deferred(Column(CompressedJSON, nullable=False))  # The schema, without tables when table_hashes is set
+    table_hashes = deferred(Column(JSON, nullable=True))  # Table name -> SchemaBlob hash (None for versions storing full schemas)
+    row_estimates = deferred(Column(JSON, nullable=True))  # Table name -> estimated row count
     hash = Column(String(64), nullable=False)  # Hash of the schema for quick comparison
+    catalog_fingerprint = Column(String(32), nullable=True)  # database_info.catalog_fingerprint, readable without loading the schema
     version = Column(Integer, nullable=False)  # Version number
     is_current = Column(Boolean, default=True)  # Whether this is the current schema
     created_at = Column(DateTime, server_default=func.now())
@@ -61,6 +94,54 @@ class SchemaVersion(Base):
             "schema": self.schema
         }
     
+class SchemaBlob(Base):
+    __tablename__ = "schema_blobs"
+
+    hash = Column(String(64), primary_key=True)  # SHA-256 of the table schema JSON
+    schema = deferred(Column(CompressedJSON, nullable=False))  # Schema of one table, shared by every version containing it unchanged
+    created_at = Column(DateTime, server_default=func.now())
+
+class SchemaSearchEntry(Base):
+    """Table and column names of the current schema version of each Source, for search"""
+    __tablename__ = "schema_search_index"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    source_id = Column(Integer, ForeignKey("sources.id", ondelete="CASCADE"), nullable=False, index=True)
+    table_name = Column(String(255), nullable=False)
+    column_name = Column(String(255), nullable=True)  # None for the entry of the table itself
+    data_type = Column(String(100), nullable=True)
+
+    def to_dict(self):
+        return {
+            "source_id": self.source_id,
+            "table_name": self.table_name,
+            "column_name": self.column_name,
+            "data_type": self.data_type
+        }
+
+class SchemaDrift(Base):
+    """Change between a Source's previous and new current schema version"""
+    __tablename__ = "schema_drifts"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    source_id = Column(Integer, ForeignKey("sources.id", ondelete="CASCADE"), nullable=False, index=True)
+    schema_version_id = Column(String(36), ForeignKey("schema_versions.id", ondelete="CASCADE"), nullable=False)
+    previous_version = Column(Integer, nullable=False)
+    version = Column(Integer, nullable=False)
+    diff = Column(JSON, nullable=False)  # As returned by schema_store.diff_schema_versions
+    detected_at = Column(DateTime, server_default=func.now())
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "source_id": self.source_id,
+            "schema_version_id": self.schema_version_id,
+            "previous_version": self.previous_version,
+            "version": self.version,
+            "diff": self.diff,
+            "detected_at": self.detected_at.isoformat() if self.detected_at else None
+        }
+
 class ExtractionJob(Base):
     __tablename__ = "extraction_jobs"
     
@@ -106,6 +187,9 @@ class SyncTable(Base):
     cursor_column = Column(String(100), nullable=False)  # Column to use for incremental syncing
     batch_size = Column(Integer, default=1000)
     sync_interval = Column(Integer, default=60)  # In minutes, how often to sync
+    spool_format = Column(String(20), default="json")  # Spool file format: json, parquet or arrow
+    raw_id_mode = Column(String(20), default="random")  # _raw_id: random, or primary_key (hash of the primary key and cursor column)
+    output_mode = Column(String(20), default="raw")  # raw (records as a _data JSON string) or typed (source columns)
     last_synced_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
@@ -127,11 +211,46 @@ class SyncTable(Base):
             "cursor_column": self.cursor_column,
             "batch_size": self.batch_size,
             "sync_interval": self.sync_interval,
+            "spool_format": self.spool_format,
+            "raw_id_mode": self.raw_id_mode,
+            "output_mode": self.output_mode,
             "last_synced_at": self.last_synced_at.isoformat() if self.last_synced_at else None,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None
         }
     
+class SyncState(Base):
+    """Model to track the committed high-water mark of a sync table"""
+    __tablename__ = "sync_states"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    sync_table_id = Column(Integer, ForeignKey("sync_tables.id", ondelete="CASCADE"), nullable=False, unique=True)
+    use_ctid = Column(Boolean, default=True)
+    cursor_column = Column(String(100), nullable=True)  # Column the watermark belongs to (None for ctid)
+    cursor_value = Column(Text, nullable=True)  # Last committed cursor/ctid value
+    extract_job_id = Column(String(36), nullable=True)  # Job that produced the watermark
+    records_synced = Column(Integer, default=0)  # Records loaded by that job
+    committed_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    # Relationships
+    sync_table = relationship("SyncTable", backref=backref("sync_state", uselist=False, cascade="all, delete-orphan"))
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "sync_table_id": self.sync_table_id,
+            "use_ctid": self.use_ctid,
+            "cursor_column": self.cursor_column,
+            "cursor_value": self.cursor_value,
+            "extract_job_id": self.extract_job_id,
+            "records_synced": self.records_synced,
+            "committed_at": self.committed_at.isoformat() if self.committed_at else None,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
+    
 class Destination(Base):
     """Model for storing destination configurations"""
     __tablename__ = "destinations"
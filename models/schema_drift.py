@@ -0,0 +1,68 @@
+"""
+Storing fetched schemas and recording how they drifted.
+
+store_schema is shared by the schema refresh endpoint and the background
+drift detection task: a fetched schema is only stored when its hash differs
+from the current version, and the diff against that version is computed once
+and kept as a SchemaDrift.
+"""
+from typing import Dict, Any, Optional, Tuple
+
+from models.database import SchemaVersion, SchemaDrift
+from models import schema_store
+from models import schema_search
+
+def get_current_version(db, source_id: int) -> Optional[SchemaVersion]:
+    """Get the current SchemaVersion of a Source, if any"""
+    return db.query(SchemaVersion).filter(
+        SchemaVersion.source_id == source_id,
+        SchemaVersion.is_current == True
+    ).first()
+
+def store_schema(db, source_id: int, schema: Dict[str, Any]) -> Tuple[Optional[SchemaVersion], Optional[SchemaVersion]]:
+    """
+    Store a fetched schema as the Source's new current version if it changed.
+
+    The search index is updated and, when the tables differ from the previous
+    version, a SchemaDrift with the diff between both is added. Nothing is
+    committed.
+
+    Args:
+        db: Database session
+        source_id: ID of the Source
+        schema: Schema as returned by PostgresSource.fetch_schema
+
+    Returns:
+        Tuple of (the previous current version, the new version); the new
+        version is None when the schema is unchanged
+    """
+    current = get_current_version(db, source_id)
+    if current and current.hash == schema_store.schema_hash(schema):
+        return current, None
+
+    next_version = 1
+    if current:
+        next_version = current.version + 1
+        db.query(SchemaVersion).filter(
+            SchemaVersion.source_id == source_id,
+            SchemaVersion.is_current == True
+        ).update({"is_current": False})
+
+    # Create new schema version, storing only tables not stored yet
+    new_version = schema_store.create_schema_version(db, source_id, schema, next_version)
+    db.add(new_version)
+    db.flush()
+    schema_search.update_search_index(db, source_id, current, new_version)
+
+    if current:
+        # Views or functions may have changed without any table changing
+        diff = schema_store.diff_schema_versions(db, current, new_version)
+        if schema_store.has_changes(diff):
+            db.add(SchemaDrift(
+                source_id=source_id,
+                schema_version_id=new_version.id,
+                previous_version=current.version,
+                version=new_version.version,
+                diff=diff
+            ))
+    return current, new_version
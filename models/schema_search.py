@@ -0,0 +1,67 @@
+"""
+Search index over the current schema version of every Source.
+
+The index holds one row per table and one per column. It is updated
+incrementally from the table hashes of the previous and new current versions,
+so only added, removed and changed tables are rewritten.
+"""
+from typing import Optional, Iterable
+
+from models.database import SchemaSearchEntry, SchemaVersion
+from models import schema_store
+
+def _entries(source_id, table_name, table_schema):
+    yield SchemaSearchEntry(source_id=source_id, table_name=table_name)
+    for column in table_schema.get("columns", []):
+        yield SchemaSearchEntry(
+            source_id=source_id,
+            table_name=table_name,
+            column_name=column["name"],
+            data_type=column.get("data_type")
+        )
+
+def _delete_tables(db, source_id, table_names: Iterable[str]):
+    table_names = list(table_names)
+    if table_names:
+        db.query(SchemaSearchEntry).filter(
+            SchemaSearchEntry.source_id == source_id,
+            SchemaSearchEntry.table_name.in_(table_names)
+        ).delete(synchronize_session=False)
+
+def _add_tables(db, source_id, schema_version: SchemaVersion, table_names: Optional[Iterable[str]] = None):
+    tables = schema_store.load_tables(db, schema_version, table_names)
+    for table_name, table_schema in tables.items():
+        db.add_all(_entries(source_id, table_name, table_schema))
+
+def is_indexed(db, source_id) -> bool:
+    """Whether a Source has entries in the index"""
+    return db.query(SchemaSearchEntry.id).filter(SchemaSearchEntry.source_id == source_id).first() is not None
+
+def update_search_index(db, source_id, previous_version: Optional[SchemaVersion], new_version: SchemaVersion):
+    """
+    Update the index of a Source for a new current schema version (not committed).
+
+    Args:
+        db: Database session
+        source_id: ID of the Source
+        previous_version: Previous current version, if any
+        new_version: New current version
+    """
+    if previous_version is None or not is_indexed(db, source_id):
+        rebuild_search_index(db, source_id, new_version)
+        return
+
+    old_hashes = schema_store.get_table_hashes(previous_version)
+    new_hashes = schema_store.get_table_hashes(new_version)
+    removed = set(old_hashes) - set(new_hashes)
+    changed = {table for table, blob_hash in new_hashes.items() if old_hashes.get(table) != blob_hash}
+
+    _delete_tables(db, source_id, removed | changed)
+    if changed:
+        _add_tables(db, source_id, new_version, changed)
+
+def rebuild_search_index(db, source_id, schema_version: Optional[SchemaVersion]):
+    """Replace the index of a Source with the tables of a schema version (not committed)"""
+    db.query(SchemaSearchEntry).filter(SchemaSearchEntry.source_id == source_id).delete(synchronize_session=False)
+    if schema_version is not None:
+        _add_tables(db, source_id, schema_version)
@@ -0,0 +1,242 @@
+"""
+Content-addressed storage of schema versions.
+
+Each table's schema is stored once in schema_blobs, keyed by the hash of its
+JSON, and a SchemaVersion only keeps a table name -> hash mapping next to the
+non-table parts of the schema (views, functions, database info). Row count
+estimates change on every ANALYZE, so they are kept on the version rather
+than in the table blobs, which would otherwise never be shared. Neither they
+nor the database info (server version, catalog fingerprint) are part of the
+version hash, so only structural changes make a new version.
+
+Schemas are stored compressed and loaded lazily; get_table_schema reads a
+single table without loading the version's schema or full mapping.
+
+Versions stored before table_hashes existed keep their full schema and are
+read as is.
+"""
+import json
+import hashlib
+from typing import Dict, Any, Optional, Iterable, Tuple
+
+from sqlalchemy.dialects.postgresql import insert
+
+from models.database import SchemaBlob, SchemaVersion
+
+# Hashes looked up per query
+_LOOKUP_CHUNK_SIZE = 1000
+
+# Non-table parts of a schema that change without its structure changing
+_VOLATILE_KEYS = ("row_estimates", "database_info")
+
+def content_hash(obj) -> str:
+    """SHA-256 of the canonical JSON of obj"""
+    return hashlib.sha256(json.dumps(obj, sort_keys=True).encode()).hexdigest()
+
+def _table_blob(table: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in table.items() if key != "estimated_row_count"}
+
+def split_schema(schema: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]], Dict[str, str]]:
+    """
+    Split a schema as returned by PostgresSource.fetch_schema for storage.
+
+    Returns:
+        Tuple of (the schema without its tables, table blobs by hash, table name -> hash)
+    """
+    rest = {key: value for key, value in schema.items() if key != "tables"}
+    rest["row_estimates"] = {}
+    blobs = {}
+    table_hashes = {}
+    for name, table in schema.get("tables", {}).items():
+        blob = _table_blob(table)
+        blob_hash = content_hash(blob)
+        blobs[blob_hash] = blob
+        table_hashes[name] = blob_hash
+        rest["row_estimates"][name] = table.get("estimated_row_count", 0)
+    return rest, blobs, table_hashes
+
+def version_hash(rest: Dict[str, Any], table_hashes: Dict[str, str]) -> str:
+    """Hash of a whole schema version from its parts, leaving out volatile ones"""
+    stable = {key: value for key, value in rest.items() if key not in _VOLATILE_KEYS}
+    return content_hash({"schema": stable, "table_hashes": table_hashes})
+
+def schema_hash(schema: Dict[str, Any]) -> str:
+    """Hash of a schema as it would be stored by create_schema_version"""
+    rest, _, table_hashes = split_schema(schema)
+    return version_hash(rest, table_hashes)
+
+def store_blobs(db, blobs: Dict[str, Dict[str, Any]]):
+    """Insert the table blobs that aren't stored yet"""
+    hashes = list(blobs)
+    for i in range(0, len(hashes), _LOOKUP_CHUNK_SIZE):
+        chunk = hashes[i:i + _LOOKUP_CHUNK_SIZE]
+        existing = {row[0] for row in db.query(SchemaBlob.hash).filter(SchemaBlob.hash.in_(chunk))}
+        missing = [{"hash": blob_hash, "schema": blobs[blob_hash]} for blob_hash in chunk if blob_hash not in existing]
+        if missing:
+            # Another refresh may store the same blobs concurrently
+            db.execute(insert(SchemaBlob).values(missing).on_conflict_do_nothing(index_elements=["hash"]))
+
+def create_schema_version(db, source_id: int, schema: Dict[str, Any], version: int) -> SchemaVersion:
+    """
+    Store the table blobs of a schema and build its (current) SchemaVersion.
+
+    The version is not added to the session; the caller adds and commits it.
+    """
+    rest, blobs, table_hashes = split_schema(schema)
+    store_blobs(db, blobs)
+    hash_ = version_hash(rest, table_hashes)
+    row_estimates = rest.pop("row_estimates")
+    return SchemaVersion(
+        source_id=source_id,
+        schema=rest,
+        table_hashes=table_hashes,
+        row_estimates=row_estimates,
+        hash=hash_,
+        catalog_fingerprint=rest.get("database_info", {}).get("catalog_fingerprint"),
+        version=version,
+        is_current=True
+    )
+
+def get_table_hashes(schema_version: SchemaVersion) -> Dict[str, str]:
+    """Table name -> blob hash of a version, computed for versions storing full schemas"""
+    if schema_version.table_hashes is not None:
+        return schema_version.table_hashes
+    return {
+        name: content_hash(_table_blob(table))
+        for name, table in (schema_version.schema or {}).get("tables", {}).items()
+    }
+
+def _load_blobs(db, hashes: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    hashes = list(set(hashes))
+    blobs = {}
+    for i in range(0, len(hashes), _LOOKUP_CHUNK_SIZE):
+        chunk = hashes[i:i + _LOOKUP_CHUNK_SIZE]
+        for blob_hash, blob in db.query(SchemaBlob.hash, SchemaBlob.schema).filter(SchemaBlob.hash.in_(chunk)):
+            blobs[blob_hash] = blob
+    return blobs
+
+def _row_estimates(schema_version: SchemaVersion) -> Dict[str, int]:
+    if schema_version.row_estimates is not None:
+        return schema_version.row_estimates
+    return schema_version.schema.get("row_estimates", {})
+
+def load_tables(db, schema_version: SchemaVersion, names: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Load table schemas of a version.
+
+    Args:
+        db: Database session
+        schema_version: SchemaVersion to read
+        names: Tables to load (default: all)
+    """
+    names = set(names) if names is not None else None
+    if schema_version.table_hashes is None:
+        tables = (schema_version.schema or {}).get("tables", {})
+        return {name: table for name, table in tables.items() if names is None or name in names}
+
+    hashes = {name: blob_hash for name, blob_hash in schema_version.table_hashes.items() if names is None or name in names}
+    blobs = _load_blobs(db, hashes.values())
+    row_estimates = _row_estimates(schema_version)
+    return {
+        name: {**blobs[blob_hash], "estimated_row_count": row_estimates.get(name, 0)}
+        for name, blob_hash in hashes.items()
+        if blob_hash in blobs
+    }
+
+def load_table(db, schema_version: SchemaVersion, table_name: str) -> Optional[Dict[str, Any]]:
+    """Load one table schema of a version, or None if the version has no such table"""
+    return load_tables(db, schema_version, [table_name]).get(table_name)
+
+def get_table_schema(db, schema_version: SchemaVersion, table_name: str) -> Optional[Dict[str, Any]]:
+    """
+    Load one table schema of a version, reading only that table's hash, row
+    estimate and blob from the metadata store.
+
+    Returns:
+        The table schema, or None if the version has no such table
+    """
+    blob_hash, row_estimate, has_table_hashes = db.query(
+        SchemaVersion.table_hashes[table_name].as_string(),
+        SchemaVersion.row_estimates[table_name].as_integer(),
+        SchemaVersion.table_hashes.isnot(None)
+    ).filter(SchemaVersion.id == schema_version.id).one()
+    if not has_table_hashes:
+        return load_table(db, schema_version, table_name)
+    if blob_hash is None:
+        return None
+    blob = db.query(SchemaBlob.schema).filter(SchemaBlob.hash == blob_hash).scalar()
+    if blob is None:
+        return None
+    return {**blob, "estimated_row_count": row_estimate or 0}
+
+def load_schema(db, schema_version: SchemaVersion) -> Dict[str, Any]:
+    """Reassemble the full schema of a version, as returned by PostgresSource.fetch_schema"""
+    if schema_version.table_hashes is None:
+        return dict(schema_version.schema)
+    schema = {key: value for key, value in schema_version.schema.items() if key != "row_estimates"}
+    schema["tables"] = load_tables(db, schema_version)
+    return schema
+
+def _diff_columns(table1: Dict[str, Any], table2: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    table1_cols = {c["name"]: c for c in table1.get("columns", [])}
+    table2_cols = {c["name"]: c for c in table2.get("columns", [])}
+
+    col_names1 = set(table1_cols.keys())
+    col_names2 = set(table2_cols.keys())
+
+    added_cols = col_names2 - col_names1
+    removed_cols = col_names1 - col_names2
+    common_cols = col_names1.intersection(col_names2)
+
+    # Check for type changes in common columns
+    changed_cols = {}
+    for col in common_cols:
+        if table1_cols[col]["data_type"] != table2_cols[col]["data_type"]:
+            changed_cols[col] = {
+                "old_type": table1_cols[col]["data_type"],
+                "new_type": table2_cols[col]["data_type"]
+            }
+
+    if not (added_cols or removed_cols or changed_cols):
+        return None
+    return {
+        "added_columns": list(added_cols),
+        "removed_columns": list(removed_cols),
+        "changed_columns": changed_cols
+    }
+
+def has_changes(diff: Dict[str, Any]) -> bool:
+    """Whether a diff from diff_schema_versions shows any structural change"""
+    return bool(diff["added_tables"] or diff["removed_tables"] or diff["modified_tables"])
+
+def diff_schema_versions(db, schema_version1: SchemaVersion, schema_version2: SchemaVersion) -> Dict[str, Any]:
+    """
+    Compare the tables of two versions.
+
+    Tables are compared by hash first and only those whose hash differs are
+    loaded and diffed column by column.
+
+    Returns:
+        Dict with added_tables, removed_tables and modified_tables
+    """
+    hashes1 = get_table_hashes(schema_version1)
+    hashes2 = get_table_hashes(schema_version2)
+
+    tables1 = set(hashes1)
+    tables2 = set(hashes2)
+    changed = [table for table in tables1 & tables2 if hashes1[table] != hashes2[table]]
+
+    changed1 = load_tables(db, schema_version1, changed)
+    changed2 = load_tables(db, schema_version2, changed)
+
+    modified_tables = {}
+    for table in changed:
+        diff = _diff_columns(changed1.get(table, {}), changed2.get(table, {}))
+        if diff:
+            modified_tables[table] = diff
+
+    return {
+        "added_tables": list(tables2 - tables1),
+        "removed_tables": list(tables1 - tables2),
+        "modified_tables": modified_tables
+    }
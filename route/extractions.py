@@ -7,7 +7,7 @@ from session_manager import get_db_session
 from models.api import ExtractJobCreate, ExtractJobResponse, StatusResponse
 
 from worker.tasks import add_extract_job, get_job_status
-from connector.postgres_source import PostgresSource as Postgres
+from connector import catalog_cache
 
 router = APIRouter(
     prefix="/extractions",
@@ -25,25 +25,15 @@ def create_extraction_job(job_data: ExtractJobCreate, db: Session = Depends(get_
             detail=f"Source database with ID {job_data.source_db_id} not found"
         )
     
-    # Validate that the table exists
-    postgres = Postgres(
-        host=source_db.host,
-        port=source_db.port,
-        database=source_db.database,
-        user=source_db.user,
-        password=source_db.password
-    )
-    
-    # Check if table exists
-    tables = postgres.fetch_tables()
-    if job_data.table_name not in tables:
+    # Check if table exists (against the cached catalog)
+    columns = catalog_cache.get_table_columns(db, source_db, job_data.table_name)
+    if columns is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Table '{job_data.table_name}' not found in source database"
         )
     
     # Check if cursor column exists
-    columns = postgres.fetch_columns(job_data.table_name)
     column_names = [col["name"] for col in columns]
     if job_data.cursor_column not in column_names:
         raise HTTPException(
@@ -67,7 +57,10 @@ def create_extraction_job(job_data: ExtractJobCreate, db: Session = Depends(get_
         cursor_column=job_data.cursor_column,
         cursor_value=job_data.cursor_value,
         batch_size=job_data.batch_size,
-        conn_params=conn_params
+        conn_params=conn_params,
+        extract_mode=job_data.extract_mode,
+        copy_format=job_data.copy_format,
+        parallelism=job_data.parallelism
     )
     
     # Save job to database
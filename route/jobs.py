@@ -10,8 +10,8 @@ router = APIRouter(
 )
     
 @router.post("/transform/{extract_job_id}")
-async def transform_data(extract_job_id: str, generation_id: Optional[str] = None):
-    """Transform extracted data to Airbyte format"""
+async def transform_data(extract_job_id: str, generation_id: Optional[str] = None, parallel: Optional[bool] = None):
+    """Transform extracted data to Airbyte format, optionally one sub-task per batch file"""
     try:
         from worker.tasks import process_transform_task
         
@@ -27,13 +27,15 @@ async def transform_data(extract_job_id: str, generation_id: Optional[str] = Non
             )
         
         # Queue transform task
-        result = process_transform_task.delay(extract_job_id, generation_id)
+        result = process_transform_task.delay(extract_job_id, generation_id, parallel)
         
         return {
             "message": "Data transformation job queued successfully",
             "task_id": result.id,
             "extract_job_id": extract_job_id
         }
+    except HTTPException as e:
+        raise e
     except Exception as e:
         logger.error(f"Error queuing transformation job: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -96,6 +98,13 @@ async def create_job(etl_job: dict):
         source = etl_job["source"]
         destination = etl_job["destination"]
         
+        # ETL jobs stream batches through the transform, which COPY extraction doesn't produce
+        if source.get("extract_mode", "keyset") == "copy":
+            raise HTTPException(
+                status_code=400,
+                detail="extract_mode 'copy' is not supported for ETL jobs, use an extraction followed by a transform and load"
+            )
+        
         # Create ETL job
         job = add_etl_job(
             source_db_id=source.get("id", "default"),
@@ -107,7 +116,14 @@ async def create_job(etl_job: dict):
             use_ctid=source.get("use_ctid", True),
             cursor_column=source.get("cursor_column"),
             cursor_value=source.get("cursor_value"),
-            batch_size=source.get("batch_size", 1000)
+            batch_size=source.get("batch_size", 1000),
+            extract_mode=source.get("extract_mode", "keyset"),
+            copy_format=source.get("copy_format", "csv"),
+            parallelism=source.get("parallelism", 1),
+            batch_format=source.get("batch_format", "records"),
+            raw_id_columns=source.get("raw_id_columns"),
+            output_mode=source.get("output_mode", "raw"),
+            column_types=source.get("column_types")
         )
         
         return {
@@ -0,0 +1,81 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+from typing import List, Optional, Literal
+
+from models.database import Source, SchemaVersion, SchemaSearchEntry
+from session_manager import get_db_session
+from models.api import SchemaSearchResult, StatusResponse
+from models.schema_search import rebuild_search_index
+
+router = APIRouter(
+    prefix="/schema-search",
+    tags=["Schema Search"]
+)
+
+def _like_pattern(q, match):
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%" if match == "prefix" else f"%{escaped}%"
+
+@router.get("/", response_model=List[SchemaSearchResult])
+def search_schemas(
+    q: str = Query(..., min_length=1),
+    match: Literal["prefix", "substring"] = "substring",
+    kind: Literal["any", "table", "column"] = "any",
+    data_type: Optional[str] = None,
+    source_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db_session)
+):
+    """
+    Search table and column names across the current schema of every Source
+
+    Args:
+        q: Text to search for (case-insensitive)
+        match: Match names starting with q ("prefix") or containing it ("substring")
+        kind: Search table names, column names or both
+        data_type: Only return columns of this data type
+        source_id: Only search this Source
+        limit: Max results
+    """
+    pattern = _like_pattern(q, match)
+    table_match = and_(
+        SchemaSearchEntry.column_name.is_(None),
+        SchemaSearchEntry.table_name.ilike(pattern, escape="\\")
+    )
+    column_match = SchemaSearchEntry.column_name.ilike(pattern, escape="\\")
+
+    query = db.query(SchemaSearchEntry, Source.name).join(Source, Source.id == SchemaSearchEntry.source_id)
+    if data_type:
+        # Type filters only apply to columns
+        query = query.filter(column_match, SchemaSearchEntry.data_type == data_type)
+    elif kind == "table":
+        query = query.filter(table_match)
+    elif kind == "column":
+        query = query.filter(column_match)
+    else:
+        query = query.filter(or_(table_match, column_match))
+    if source_id is not None:
+        query = query.filter(SchemaSearchEntry.source_id == source_id)
+
+    results = query.order_by(
+        Source.name,
+        SchemaSearchEntry.table_name,
+        SchemaSearchEntry.column_name.nullsfirst()
+    ).limit(limit).all()
+
+    return [{**entry.to_dict(), "source_name": source_name} for entry, source_name in results]
+
+@router.post("/reindex", response_model=StatusResponse)
+def reindex_schemas(db: Session = Depends(get_db_session)):
+    """Rebuild the search index from the current schema version of every Source"""
+    sources = db.query(Source.id).all()
+    for (source_id,) in sources:
+        current = db.query(SchemaVersion).filter(
+            SchemaVersion.source_id == source_id,
+            SchemaVersion.is_current == True
+        ).first()
+        rebuild_search_index(db, source_id, current)
+    db.commit()
+
+    return {"status": "success", "message": f"Schema search index rebuilt for {len(sources)} sources"}
@@ -1,32 +1,104 @@
-import json
-import hashlib
+import io
+import csv
+import psycopg
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Response
+from fastapi.responses import StreamingResponse, ORJSONResponse
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from sqlalchemy import desc
 
-from models.database import Source, SchemaVersion
+from models.database import Source, SchemaVersion, SchemaDrift
+from models import schema_store
+from models import schema_drift
 from session_manager import get_db_session
 from models.api import (
     SourceCreate, 
     SourceUpdate, 
     SourceResponse,
     TestConnectionRequest,
+    QueryRequest,
     StatusResponse
 )
-from connector.postgres_source import PostgresSource
+from core import serialization
+from connector.postgres_source import PostgresSource, AsyncPostgresSource, QUERY_STREAM_MAX_ROWS
+from connector.pool import close_pool
+from connector import catalog_cache
 
 router = APIRouter(
     prefix="/sources",
     tags=["Sources"]
 )
 
+# Stored schemas never change, but clients must revalidate to see new versions
+SCHEMA_CACHE_CONTROL = "private, no-cache"
+
+def _etag_matches(if_none_match, etag):
+    """Whether an If-None-Match header matches an ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in [tag.removeprefix("W/") for tag in tags]
+
+def _cached_json_response(content_fn, etag, if_none_match):
+    """Answer 304 if the client has the ETag already, else the JSON built by content_fn"""
+    headers = {"ETag": etag, "Cache-Control": SCHEMA_CACHE_CONTROL}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return ORJSONResponse(content=content_fn(), headers=headers)
+
+def _get_source(db, source_id):
+    """Get a Source by ID or answer 404"""
+    db_obj = db.query(Source).filter(Source.id == source_id).first()
+    if not db_obj:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Source with ID {source_id} not found"
+        )
+    return db_obj
+
+def _add_source(db, db_obj):
+    """Insert a Source and reload it with its generated fields"""
+    db.add(db_obj)
+    db.commit()
+    db.refresh(db_obj)
+
+def _store_fetched_schema(db, source_id, schema):
+    """Store a fetched schema and commit if it produced a new version"""
+    previous, new_schema = schema_drift.store_schema(db, source_id, schema)
+    if new_schema is not None:
+        db.commit()
+    return previous, new_schema
+
+def _get_schema_version(db, source_id, version):
+    """Get a specific schema version, or the current one when version is not given"""
+    schema_query = db.query(SchemaVersion).filter(SchemaVersion.source_id == source_id)
+    if version:
+        schema_version = schema_query.filter(SchemaVersion.version == version).first()
+        if not schema_version:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Schema version {version} not found for Source ID {source_id}"
+            )
+        return schema_version
+    return schema_query.filter(SchemaVersion.is_current == True).first()
+
+def _close_source_pool(db_obj):
+    """Close the pooled connections opened with a Source's current settings"""
+    close_pool(PostgresSource(
+        host=db_obj.host,
+        port=db_obj.port,
+        database=db_obj.database,
+        user=db_obj.user,
+        password=db_obj.password
+    ).conn_params)
+
 @router.post("/", response_model=SourceResponse)
-def create_source_db(db_data: SourceCreate, db: Session = Depends(get_db_session)):
+async def create_source_db(db_data: SourceCreate, db: Session = Depends(get_db_session)):
     """Create a new Source connection"""
     # Test the connection first
-    postgres = PostgresSource(
+    postgres = AsyncPostgresSource(
         host=db_data.host,
         port=db_data.port,
         database=db_data.database,
@@ -34,7 +106,7 @@ def create_source_db(db_data: SourceCreate, db: Session = Depends(get_db_session
         password=db_data.password
     )
     
-    if not postgres.check_connection():
+    if not await postgres.check_connection():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Could not connect to the database with the provided credentials"
@@ -47,12 +119,11 @@ def create_source_db(db_data: SourceCreate, db: Session = Depends(get_db_session
         port=db_data.port,
         database=db_data.database,
         user=db_data.user,
-        password=db_data.password
+        password=db_data.password,
+        schemas=db_data.schemas
     )
     
-    db.add(db_obj)
-    db.commit()
-    db.refresh(db_obj)
+    await run_in_threadpool(_add_source, db, db_obj)
     
     return db_obj.to_dict()
 
@@ -83,6 +154,10 @@ def update_source_db(source_id: int, db_data: SourceUpdate, db: Session = Depend
             detail=f"Source with ID {source_id} not found"
         )
     
+    # Pooled connections and the cached catalog belong to the old settings
+    _close_source_pool(db_obj)
+    catalog_cache.invalidate(source_id)
+    
     # Update attributes that were provided
     update_data = db_data.dict(exclude_unset=True)
     for key, value in update_data.items():
@@ -103,15 +178,17 @@ def delete_source_db(source_id: int, db: Session = Depends(get_db_session)):
             detail=f"Source with ID {source_id} not found"
         )
     
+    _close_source_pool(db_obj)
+    catalog_cache.invalidate(source_id)
     db.delete(db_obj)
     db.commit()
     
     return {"status": "success", "message": f"Source with ID {source_id} deleted successfully"}
 
 @router.post("/test-connection", response_model=StatusResponse)
-def test_connection(conn_data: TestConnectionRequest):
+async def test_connection(conn_data: TestConnectionRequest):
     """Test a database connection without saving it"""
-    postgres = PostgresSource(
+    postgres = AsyncPostgresSource(
         host=conn_data.host,
         port=conn_data.port,
         database=conn_data.database,
@@ -119,7 +196,7 @@ def test_connection(conn_data: TestConnectionRequest):
         password=conn_data.password
     )
     
-    if postgres.check_connection():
+    if await postgres.check_connection():
         return {"status": "success", "message": "Connection successful"}
     else:
         raise HTTPException(
@@ -128,45 +205,39 @@ def test_connection(conn_data: TestConnectionRequest):
         )
 
 @router.get("/{source_id}/tables", response_model=List[str])
-def get_source_tables(source_id: int, db: Session = Depends(get_db_session)):
+async def get_source_tables(source_id: int, db: Session = Depends(get_db_session)):
     """Get all tables from a Source"""
-    db_obj = db.query(Source).filter(Source.id == source_id).first()
-    if not db_obj:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Source with ID {source_id} not found"
-        )
+    db_obj = await run_in_threadpool(_get_source, db, source_id)
     
-    postgres = PostgresSource(
+    postgres = AsyncPostgresSource(
         host=db_obj.host,
         port=db_obj.port,
         database=db_obj.database,
         user=db_obj.user,
-        password=db_obj.password
+        password=db_obj.password,
+        pooled=True,
+        schemas=db_obj.schemas
     )
     
-    tables = postgres.fetch_tables()
+    tables = await postgres.fetch_tables()
     return tables
 
 @router.get("/{source_id}/tables/{table_name}/columns")
-def get_source_table_columns(source_id: int, table_name: str, db: Session = Depends(get_db_session)):
+async def get_source_table_columns(source_id: int, table_name: str, db: Session = Depends(get_db_session)):
     """Get columns for a specific table in a Source"""
-    db_obj = db.query(Source).filter(Source.id == source_id).first()
-    if not db_obj:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Source with ID {source_id} not found"
-        )
+    db_obj = await run_in_threadpool(_get_source, db, source_id)
     
-    postgres = PostgresSource(
+    postgres = AsyncPostgresSource(
         host=db_obj.host,
         port=db_obj.port,
         database=db_obj.database,
         user=db_obj.user,
-        password=db_obj.password
+        password=db_obj.password,
+        pooled=True,
+        schemas=db_obj.schemas
     )
     
-    columns = postgres.fetch_columns(table_name)
+    columns = await postgres.fetch_columns(table_name)
     if not columns:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -176,76 +247,44 @@ def get_source_table_columns(source_id: int, table_name: str, db: Session = Depe
     return columns
 
 @router.post("/{source_id}/schema", response_model=StatusResponse)
-def fetch_and_store_schema(source_id: int, db: Session = Depends(get_db_session)):
+async def fetch_and_store_schema(source_id: int, db: Session = Depends(get_db_session)):
     """Fetch the schema from a Source and store it as a new version"""
     # Get Source
-    db_obj = db.query(Source).filter(Source.id == source_id).first()
-    if not db_obj:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Source with ID {source_id} not found"
-        )
+    db_obj = await run_in_threadpool(_get_source, db, source_id)
     
     # Initialize Postgres connection
-    postgres = PostgresSource(
+    postgres = AsyncPostgresSource(
         host=db_obj.host,
         port=db_obj.port,
         database=db_obj.database,
         user=db_obj.user,
-        password=db_obj.password
+        password=db_obj.password,
+        pooled=True,
+        schemas=db_obj.schemas
     )
 
     # Fetch schema
     try:
-        schema = postgres.fetch_schema()
+        schema = await postgres.fetch_schema()
         if not schema:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to fetch database schema"
             )
         
-        # Calculate schema hash for comparison
-        schema_json = json.dumps(schema, sort_keys=True)
-        schema_hash = hashlib.sha256(schema_json.encode()).hexdigest()
-        
-        # Check if schema has changed
-        latest_schema = db.query(SchemaVersion).filter(
-            SchemaVersion.source_db_id == source_id,
-            SchemaVersion.is_current == True
-        ).first()
-        
-        if latest_schema and latest_schema.hash == schema_hash:
+        # Store it as a new version unless its hash matches the current one
+        previous, new_schema = await run_in_threadpool(_store_fetched_schema, db, source_id, schema)
+        if new_schema is None:
             return {
                 "status": "success", 
-                "message": f"Schema for database '{db_obj.name}' is already up to date (version {latest_schema.version})"
+                "message": f"Schema for database '{db_obj.name}' is already up to date (version {previous.version})"
             }
-        
-        # Get next version number
-        next_version = 1
-        if latest_schema:
-            next_version = latest_schema.version + 1
-            
-            # Update all existing versions to not be current
-            db.query(SchemaVersion).filter(
-                SchemaVersion.source_db_id == source_id,
-                SchemaVersion.is_current == True
-            ).update({"is_current": False})
-
-        # Create new schema version
-        new_schema = SchemaVersion(
-            source_db_id=source_id,
-            schema=schema,
-            hash=schema_hash,
-            version=next_version,
-            is_current=True
-        )
-        
-        db.add(new_schema)
-        db.commit()
+
+        catalog_cache.invalidate(source_id)
         
         return {
             "status": "success", 
-            "message": f"Schema for database '{db_obj.name}' fetched and stored as version {next_version}"
+            "message": f"Schema for database '{db_obj.name}' fetched and stored as version {new_schema.version}"
         }
     
     except Exception as e:
@@ -255,71 +294,61 @@ def fetch_and_store_schema(source_id: int, db: Session = Depends(get_db_session)
         )
     
 @router.get("/{source_id}/schema", response_model=dict)
-def get_source_schema(
+async def get_source_schema(
     source_id: int, 
     version: Optional[int] = None,
     refresh: bool = False, 
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db_session)
 ):
     """
     Get the schema for a Source
     
+    The response carries an ETag derived from the version's hash; requests
+    with a matching If-None-Match get a 304 without the schema being loaded.
+    
     Args:
         source_id: ID of the Source
         version: Specific version to fetch (default: current version)
         refresh: Whether to refresh the schema from the database (default: False)
     """
     # Get Source
-    db_obj = db.query(Source).filter(Source.id == source_id).first()
-    if not db_obj:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Source with ID {source_id} not found"
-        )
+    db_obj = await run_in_threadpool(_get_source, db, source_id)
     
     # If refresh is requested, fetch new schema
     if refresh:
-        response = fetch_and_store_schema(source_id, db)
+        response = await fetch_and_store_schema(source_id, db)
         if response["status"] != "success":
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=response["message"]
             )
         
-    # Query for requested schema version
-    schema_query = db.query(SchemaVersion).filter(SchemaVersion.source_db_id == source_id)
-    
-    if version:
-        # Get specific version
-        schema_version = schema_query.filter(SchemaVersion.version == version).first()
-        if not schema_version:
+    # Query for requested schema version, or the current one
+    schema_version = await run_in_threadpool(_get_schema_version, db, source_id, version)
+    if not schema_version:
+        # No schema versions yet, try fetching
+        if not refresh:  # Only fetch if we haven't already tried
+            return await fetch_and_store_schema(source_id, db)
+        else:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Schema version {version} not found for Source ID {source_id}"
+                detail=f"No schema available for Source ID {source_id}"
             )
-        
-    else:
-        # Get current version
-        schema_version = schema_query.filter(SchemaVersion.is_current == True).first()
-        if not schema_version:
-            # No schema versions yet, try fetching
-            if not refresh:  # Only fetch if we haven't already tried
-                return fetch_and_store_schema(source_id, db)
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"No schema available for Source ID {source_id}"
-                )
             
     # Return schema with version info
-    result = schema_version.schema
-    result["_metadata"] = {
-        "version": schema_version.version,
-        "created_at": schema_version.created_at.isoformat(),
-        "source_database": db_obj.name
-    }
+    def build_result():
+        result = schema_store.load_schema(db, schema_version)
+        result["_metadata"] = {
+            "version": schema_version.version,
+            "created_at": schema_version.created_at.isoformat(),
+            "source_database": db_obj.name
+        }
+        return result
     
-    return result
+    etag = f'W/"{schema_version.hash}.{schema_version.version}"'
+    # Loading and serializing the schema queries the store and is CPU-bound
+    return await run_in_threadpool(_cached_json_response, build_result, etag, if_none_match)
 
 @router.get("/{source_id}/schema/versions", response_model=List[dict])
 def get_schema_versions(
@@ -344,7 +373,7 @@ def get_schema_versions(
         SchemaVersion.created_at,
         SchemaVersion.hash
     ).filter(
-        SchemaVersion.source_db_id == source_id
+        SchemaVersion.source_id == source_id
     ).order_by(desc(SchemaVersion.version)).limit(limit).all()
     
     result = []
@@ -359,11 +388,33 @@ def get_schema_versions(
     
     return result
 
+@router.get("/{source_id}/schema/drifts", response_model=List[dict])
+def get_schema_drifts(
+    source_id: int,
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db_session)
+):
+    """Get the detected schema changes of a Source, newest first"""
+    # Check if Source exists
+    db_obj = db.query(Source).filter(Source.id == source_id).first()
+    if not db_obj:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Source with ID {source_id} not found"
+        )
+
+    drifts = db.query(SchemaDrift).filter(
+        SchemaDrift.source_id == source_id
+    ).order_by(desc(SchemaDrift.version)).limit(limit).all()
+
+    return [drift.to_dict() for drift in drifts]
+
 @router.get("/{source_id}/schema/diff", response_model=dict)
 def compare_schema_versions(
     source_id: int,
     version1: int,
     version2: int,
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db_session)
 ):
     """
@@ -384,12 +435,12 @@ def compare_schema_versions(
     
     # Get both schema versions
     schema1 = db.query(SchemaVersion).filter(
-        SchemaVersion.source_db_id == source_id,
+        SchemaVersion.source_id == source_id,
         SchemaVersion.version == version1
     ).first()
     
     schema2 = db.query(SchemaVersion).filter(
-        SchemaVersion.source_db_id == source_id,
+        SchemaVersion.source_id == source_id,
         SchemaVersion.version == version2
     ).first()
 
@@ -405,58 +456,99 @@ def compare_schema_versions(
             detail=f"Schema version {version2} not found for Source ID {source_id}"
         )
     
-    # Calculate schema differences
-    schema1_data = schema1.schema
-    schema2_data = schema2.schema
-    
-    # Find added, removed, and modified tables
-    tables1 = set(schema1_data.get("tables", {}).keys())
-    tables2 = set(schema2_data.get("tables", {}).keys())
-    
-    added_tables = tables2 - tables1
-    removed_tables = tables1 - tables2
-    common_tables = tables1.intersection(tables2)
+    def build_result():
+        # Compare table hashes, deep-diffing only the tables that changed
+        changes = schema_store.diff_schema_versions(db, schema1, schema2)
+        return {
+            "metadata": {
+                "version1": version1,
+                "version2": version2,
+                "created_at1": schema1.created_at.isoformat(),
+                "created_at2": schema2.created_at.isoformat()
+            },
+            "changes": changes
+        }
 
-    # For common tables, check for column changes
-    modified_tables = {}
-    for table in common_tables:
-        table1_cols = {c["name"]: c for c in schema1_data["tables"][table].get("columns", [])}
-        table2_cols = {c["name"]: c for c in schema2_data["tables"][table].get("columns", [])}
-        
-        col_names1 = set(table1_cols.keys())
-        col_names2 = set(table2_cols.keys())
-        
-        added_cols = col_names2 - col_names1
-        removed_cols = col_names1 - col_names2
-        common_cols = col_names1.intersection(col_names2)
-        
-        # Check for type changes in common columns
-        changed_cols = {}
-        for col in common_cols:
-            if table1_cols[col]["data_type"] != table2_cols[col]["data_type"]:
-                changed_cols[col] = {
-                    "old_type": table1_cols[col]["data_type"],
-                    "new_type": table2_cols[col]["data_type"]
-                }
-        
-        # If there are any changes, add to modified tables
-        if added_cols or removed_cols or changed_cols:
-            modified_tables[table] = {
-                "added_columns": list(added_cols),
-                "removed_columns": list(removed_cols),
-                "changed_columns": changed_cols
-            }
+    # A diff only depends on the two versions
+    etag = f'W/"{schema1.hash}.{schema1.version}-{schema2.hash}.{schema2.version}"'
+    return _cached_json_response(build_result, etag, if_none_match)
 
-    return {
-        "metadata": {
-            "version1": version1,
-            "version2": version2,
-            "created_at1": schema1.created_at.isoformat(),
-            "created_at2": schema2.created_at.isoformat()
-        },
-        "changes": {
-            "added_tables": list(added_tables),
-            "removed_tables": list(removed_tables),
-            "modified_tables": modified_tables
-        }
-    }
\ No newline at end of file
+def _ndjson_chunk(columns, rows):
+    return b"".join(serialization.dumps(dict(zip(columns, row))) + b"\n" for row in rows)
+
+def _csv_value(value):
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (dict, list)):
+        return serialization.dumps_str(value)
+    # Same text as in NDJSON output (ISO dates, numerics as text, base64 bytes, ...)
+    return serialization.dumps_str(value).strip('"')
+
+def _csv_chunk(rows, header=None):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header is not None:
+        writer.writerow(header)
+    writer.writerows([_csv_value(value) for value in row] for row in rows)
+    return buffer.getvalue().encode()
+
+@router.post("/{source_id}/query/stream")
+async def stream_source_query(
+    source_id: int,
+    query_data: QueryRequest,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    db: Session = Depends(get_db_session)
+):
+    """
+    Run a read-only query against a Source and stream the results
+    
+    Rows are read through a server-side cursor and sent as they are fetched,
+    up to a row cap and under a statement timeout.
+    
+    Args:
+        source_id: ID of the Source
+        format: Output format, "ndjson" (one JSON object per row) or "csv" (with a header)
+    """
+    db_obj = await run_in_threadpool(_get_source, db, source_id)
+    
+    postgres = AsyncPostgresSource(
+        host=db_obj.host,
+        port=db_obj.port,
+        database=db_obj.database,
+        user=db_obj.user,
+        password=db_obj.password,
+        pooled=True,
+        schemas=db_obj.schemas
+    )
+    
+    max_rows = min(query_data.max_rows or QUERY_STREAM_MAX_ROWS, QUERY_STREAM_MAX_ROWS)
+    batches = postgres.stream_query(query_data.query, query_data.params, max_rows=max_rows)
+    
+    # Run the query up to its first batch so errors are still reported as a status code
+    try:
+        columns, rows = await anext(batches)
+    except StopAsyncIteration:
+        # Statements without a result set
+        columns, rows = [], []
+    except psycopg.Error as e:
+        await batches.aclose()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Query failed: {str(e)}"
+        )
+    
+    async def body():
+        try:
+            if format == "csv":
+                yield _csv_chunk(rows, header=columns)
+                async for _, batch in batches:
+                    yield _csv_chunk(batch)
+            else:
+                yield _ndjson_chunk(columns, rows)
+                async for _, batch in batches:
+                    yield _ndjson_chunk(columns, batch)
+        finally:
+            await batches.aclose()
+    
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(body(), media_type=media_type, headers={"X-Row-Limit": str(max_rows)})
@@ -4,9 +4,11 @@ from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
 
 from models.database import SyncTable, Source, SchemaVersion
+from models import schema_store
 from session_manager import get_db_session
-from models.api import StatusResponse, SyncTableCreate, SyncTableResponse, SyncTableUpdate
-from connector.postgres_source import PostgresSource
+from models.api import StatusResponse, SyncTableCreate, SyncTableResponse, SyncTableUpdate, SyncStateResponse
+from connector import catalog_cache
+from worker.sync_state import get_sync_state, reset_sync_state
 
 router = APIRouter(
     prefix="/sync-tables",
@@ -27,23 +29,21 @@ def create_sync_table(table_data: SyncTableCreate, db: Session = Depends(get_db_
     
     # Get the current schema version for this source
     schema_version = db.query(SchemaVersion).filter(
-        SchemaVersion.source_db_id == table_data.source_db_id,
+        SchemaVersion.source_id == table_data.source_db_id,
         SchemaVersion.is_current == True
     ).first()
 
     if schema_version:
         # Validate that the table exists in the schema
-        schema_data = schema_version.schema
-        tables = schema_data.get("tables", {})
+        table_schema = schema_store.get_table_schema(db, schema_version, table_data.table_name)
         
-        if table_data.table_name not in tables:
+        if table_schema is None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Table '{table_data.table_name}' not found in the current schema (version {schema_version.version})"
             )
             
         # Validate that the cursor column exists in the table
-        table_schema = tables[table_data.table_name]
         columns = table_schema.get("columns", [])
         column_names = [col.get("name") for col in columns]
         
@@ -67,7 +67,10 @@ def create_sync_table(table_data: SyncTableCreate, db: Session = Depends(get_db_
         is_active=table_data.is_active,
         cursor_column=table_data.cursor_column,
         batch_size=table_data.batch_size,
-        sync_interval=table_data.sync_interval
+        sync_interval=table_data.sync_interval,
+        spool_format=table_data.spool_format,
+        raw_id_mode=table_data.raw_id_mode,
+        output_mode=table_data.output_mode
     )
     
     try:
@@ -156,15 +159,7 @@ def update_sync_table(sync_table_id: int, table_data: SyncTableUpdate, db: Sessi
     
     # If updating cursor column, validate it exists in the table
     if table_data.cursor_column is not None:
-        source = PostgresSource(
-            host=source_db.host,
-            port=source_db.port,
-            database=source_db.database,
-            user=source_db.user,
-            password=source_db.password
-        )
-        
-        columns = source.fetch_columns(sync_table.table_name)
+        columns = catalog_cache.get_table_columns(db, source_db, sync_table.table_name) or []
         column_names = [col["name"] for col in columns]
         
         if table_data.cursor_column not in column_names:
@@ -172,21 +167,26 @@ def update_sync_table(sync_table_id: int, table_data: SyncTableUpdate, db: Sessi
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Column '{table_data.cursor_column}' not found in table '{sync_table.table_name}'"
             )
+
+        # A watermark recorded for another cursor column can't be resumed from;
+        # it is dropped in the same commit as the new cursor column
+        if table_data.cursor_column != sync_table.cursor_column:
+            reset_sync_state(db, sync_table.id)
     
-        # Update fields that were provided
-        update_data = table_data.dict(exclude_unset=True)
-        for key, value in update_data.items():
-            setattr(sync_table, key, value)
-        
-        # Save changes
-        db.commit()
-        db.refresh(sync_table)
-        
-        # Return with source_db_name included
-        response = sync_table.to_dict()
-        response["source_db_name"] = source_db.name
-        
-        return response
+    # Update fields that were provided
+    update_data = table_data.dict(exclude_unset=True)
+    for key, value in update_data.items():
+        setattr(sync_table, key, value)
+    
+    # Save changes
+    db.commit()
+    db.refresh(sync_table)
+    
+    # Return with source_db_name included
+    response = sync_table.to_dict()
+    response["source_db_name"] = source_db.name
+    
+    return response
 
 @router.delete("/{sync_table_id}", response_model=StatusResponse)
 def delete_sync_table(sync_table_id: int, db: Session = Depends(get_db_session)):
@@ -227,4 +227,37 @@ def toggle_sync_table(sync_table_id: int, db: Session = Depends(get_db_session))
     return {
         "status": "success",
         "message": f"Sync for '{sync_table.table_name}' has been {status_msg}"
+    }
+
+@router.get("/{sync_table_id}/state", response_model=SyncStateResponse)
+def get_sync_table_state(sync_table_id: int, db: Session = Depends(get_db_session)):
+    """Get the committed incremental sync watermark of a table"""
+    state = get_sync_state(db, sync_table_id)
+    
+    if not state:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No sync state recorded for sync table with ID {sync_table_id}"
+        )
+    
+    return state.to_dict()
+
+@router.post("/{sync_table_id}/reset", response_model=StatusResponse)
+def reset_sync_table_state(sync_table_id: int, db: Session = Depends(get_db_session)):
+    """Reset a table's sync watermark so the next sync starts from the beginning"""
+    sync_table = db.query(SyncTable).filter(SyncTable.id == sync_table_id).first()
+    
+    if not sync_table:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Sync table with ID {sync_table_id} not found"
+        )
+    
+    reset = reset_sync_state(db, sync_table_id)
+    db.commit()
+    
+    status_msg = "reset" if reset else "already empty"
+    return {
+        "status": "success",
+        "message": f"Sync state for '{sync_table.table_name}' {status_msg}; the next sync will start from the beginning"
     }
\ No newline at end of file
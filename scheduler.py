@@ -1,3 +1,4 @@
+import os
 import sys
 import time
 import pytz
@@ -5,21 +6,63 @@ import pytz
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from config import DATABASE_URL
-from models.database import Connection, ScheduleType, SyncTable, Source
+from models.database import Connection, ScheduleType, SyncTable, Source, SchemaVersion
+from models import schema_store
 from datetime import datetime
 from croniter import croniter
-from worker.tasks import add_extract_job
+from worker.tasks import add_extract_job, detect_schema_drift_task
+from worker.sync_state import get_resume_cursor_value
 from utils import logger
 
 # Create a database session
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Seconds between schema drift checks of all Sources (0 disables them)
+SCHEMA_DRIFT_INTERVAL = float(os.getenv("SCHEMA_DRIFT_INTERVAL", 3600))
+
+def get_table_schema(db, source_id, table_name):
+    """Get a table's schema from the Source's current schema version"""
+    schema_version = db.query(SchemaVersion).filter(
+        SchemaVersion.source_id == source_id,
+        SchemaVersion.is_current == True
+    ).first()
+    if not schema_version:
+        return None
+    return schema_store.get_table_schema(db, schema_version, table_name)
+
+def get_column_types(table_schema):
+    """Get column name -> data type from a table schema"""
+    if not table_schema:
+        return None
+    return {col["name"]: col["data_type"] for col in table_schema.get("columns", [])}
+
+def get_raw_id_columns(table, table_schema):
+    """Get the columns hashed into _raw_id for a sync table (None for random ids)"""
+    if table.raw_id_mode != "primary_key":
+        return None
+    primary_key = (table_schema or {}).get("primary_key") or []
+    if not primary_key:
+        logger.warning(f"Table {table.table_name} has no primary key in its stored schema, using random _raw_ids")
+        return None
+    # The cursor value tells apart versions of the same row
+    return primary_key + [table.cursor_column] if table.cursor_column not in primary_key else list(primary_key)
+
 # Main scheduler loop
 def run_scheduler(args):
     logger.info(f"Starting scheduler service with {args.check_interval} second interval...")
+    last_drift_check = None
     try:
         while True:
+            # Queue schema drift detection so refreshes stay off the request path
+            if SCHEMA_DRIFT_INTERVAL > 0 and (last_drift_check is None or time.monotonic() - last_drift_check >= SCHEMA_DRIFT_INTERVAL):
+                try:
+                    detect_schema_drift_task.delay()
+                    last_drift_check = time.monotonic()
+                    logger.info("Queued schema drift detection")
+                except Exception as e:
+                    logger.error(f"Failed to queue schema drift detection: {str(e)}")
+
             db = SessionLocal()
             try:
                 logger.info("Checking for scheduled tasks...")
@@ -77,17 +120,27 @@ def run_scheduler(args):
                                 # Queue extract job for each table
                                 for table in tables:
                                     try:
+                                        # Resume from the last committed watermark (None starts from the beginning)
+                                        cursor_value = get_resume_cursor_value(db, table.id, use_ctid=True)
+
+                                        table_schema = get_table_schema(db, source_db_id, table.table_name)
+
                                         # Add extraction job
                                         add_extract_job(
                                             source_db_id=source_db_id,
                                             table_name=table.table_name,
                                             cursor_column=table.cursor_column,
-                                            cursor_value=None,  # Start from beginning
+                                            cursor_value=cursor_value,
                                             batch_size=table.batch_size,
-                                            conn_params=conn_params
+                                            conn_params=conn_params,
+                                            sync_table_id=table.id,
+                                            spool_format=table.spool_format or "json",
+                                            column_types=get_column_types(table_schema),
+                                            raw_id_columns=get_raw_id_columns(table, table_schema),
+                                            output_mode=table.output_mode or "raw"
                                         )
                                         
-                                        logger.info(f"Queued extraction job for table: {table.table_name}")
+                                        logger.info(f"Queued extraction job for table: {table.table_name} from {cursor_value or 'the beginning'}")
                                     except Exception as e:
                                         logger.error(f"Failed to queue extraction for table {table.table_name}: {str(e)}")
                                 
@@ -6,6 +6,7 @@ from celery.result import AsyncResult
 from worker.celery_app import celery_app
 from worker.redis_client import RedisClient
 from core.jobs import ExtractJob, LoadJob
+from core import serialization
 
 logger = logging.getLogger("job_manager")
 
@@ -25,7 +26,7 @@ def update_job_status(job):
     else:
         key = f"job:{job.id}"
 
-    redis_client.set(key, json.dumps(job.to_dict()))
+    redis_client.set(key, serialization.dumps_str(job.to_dict()))
 
 def get_job_status(job_id, job_type="extract"):
     """Get job status from Redis or Celery"""
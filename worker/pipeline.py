@@ -0,0 +1,110 @@
+import os
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+logger = logging.getLogger("etl.pipeline")
+
+# Batches allowed to wait between two stages before the producer blocks
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", 4))
+
+# Transformed records buffered before a BigQuery load job is issued
+PIPELINE_LOAD_BATCH_ROWS = int(os.getenv("PIPELINE_LOAD_BATCH_ROWS", 50000))
+
+_END = object()
+
+async def run_streaming_etl(extractor, job, transformer, loader, dataset, table,
+                            queue_size=PIPELINE_QUEUE_SIZE, load_batch_rows=PIPELINE_LOAD_BATCH_ROWS, load_schema=None):
+    """
+    Run extract -> transform -> load as connected stages, one batch at a time.
+
+    Stages are linked by bounded queues, so a slow stage applies backpressure
+    to the ones before it and at most a few batches (plus one load buffer) are
+    held in memory, regardless of the table size. Transforms and loads run in
+    threads so the extractor keeps reading from the source meanwhile.
+
+    With an extractor producing Arrow batches, records stay columnar end to
+    end: batches go through Transformer.transform_arrow and are loaded to
+    BigQuery as Parquet.
+
+    Args:
+        extractor: PostgresExtractor used to iterate the job's batches
+        job: ExtractJob to run (updated in place with progress)
+        transformer: Transformer applied to each extracted batch
+        loader: BigQueryLoader receiving transformed records
+        dataset: Destination dataset
+        table: Destination table
+        queue_size: Max batches waiting between two stages
+        load_batch_rows: Records buffered before each load to BigQuery
+        load_schema: Explicit BigQuery schema of record loads (default: detected)
+
+    Returns:
+        Tuple of (records transformed, records loaded)
+    """
+    transform_queue = asyncio.Queue(maxsize=queue_size)
+    load_queue = asyncio.Queue(maxsize=queue_size)
+    counts = {"transformed": 0, "loaded": 0}
+    arrow = getattr(extractor, "batch_format", "records") == "arrow"
+    transform = transformer.transform_arrow if arrow else transformer.transform
+
+    async def extract_stage():
+        async for batch in extractor.iter_batches(job):
+            await transform_queue.put(batch)
+        await transform_queue.put(_END)
+
+    async def transform_stage():
+        while True:
+            batch = await transform_queue.get()
+            if batch is _END:
+                await load_queue.put(_END)
+                return
+            transformed = await asyncio.to_thread(transform, batch)
+            counts["transformed"] += transformed.num_rows if arrow else len(transformed)
+            await load_queue.put(transformed)
+
+    async def load_stage():
+        buffer = []
+        buffered_rows = 0
+        while True:
+            records = await load_queue.get()
+            if records is not _END:
+                if arrow:
+                    buffer.append(records)
+                    buffered_rows += records.num_rows
+                else:
+                    buffer.extend(records)
+                    buffered_rows = len(buffer)
+            if buffered_rows and (records is _END or buffered_rows >= load_batch_rows):
+                if arrow:
+                    # The loader sets _loaded_at column-wise
+                    await asyncio.to_thread(loader.load_arrow_to_bigquery, dataset, table, buffer)
+                else:
+                    # Add loading timestamp to records
+                    loaded_at = datetime.now(timezone.utc).isoformat()
+                    for record in buffer:
+                        record["_loaded_at"] = loaded_at
+                    await asyncio.to_thread(loader.load_to_bigquery, dataset, table, buffer, schema=load_schema)
+                counts["loaded"] += buffered_rows
+                logger.info(f"Loaded {counts['loaded']} records to {dataset}.{table} so far")
+                buffer = []
+                buffered_rows = 0
+            if records is _END:
+                return
+
+    tasks = [
+        asyncio.create_task(extract_stage()),
+        asyncio.create_task(transform_stage()),
+        asyncio.create_task(load_stage())
+    ]
+    try:
+        # Fail fast: the first stage error cancels the others
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            task.result()
+        await asyncio.gather(*pending)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    return counts["transformed"], counts["loaded"]
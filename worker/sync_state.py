@@ -0,0 +1,90 @@
+import logging
+from datetime import datetime
+
+from models.database import SyncState, SyncTable
+from session_manager import SessionLocal
+
+logger = logging.getLogger("sync_state")
+
+def get_sync_state(db, sync_table_id):
+    """Get the stored sync state of a sync table, if any"""
+    return db.query(SyncState).filter(SyncState.sync_table_id == sync_table_id).first()
+
+def get_resume_cursor_value(db, sync_table_id, use_ctid, cursor_column=None):
+    """
+    Get the committed watermark to start the next extraction of a sync table from.
+
+    The watermark is only reused when it was recorded for the same extraction
+    method (ctid or the same cursor column); otherwise the sync starts over.
+    """
+    state = get_sync_state(db, sync_table_id)
+    if not state or state.cursor_value is None:
+        return None
+    if bool(state.use_ctid) != bool(use_ctid):
+        return None
+    if not use_ctid and state.cursor_column != cursor_column:
+        return None
+    return state.cursor_value
+
+def commit_sync_state(job, records_synced):
+    """
+    Record the watermark of a successfully loaded extract job for its sync table.
+
+    Args:
+        job: ExtractJob or its dict (as stored in Redis)
+        records_synced: Number of records loaded by the job
+
+    Returns:
+        bool: True if a watermark was stored
+    """
+    job_data = job if isinstance(job, dict) else job.to_dict()
+    sync_table_id = job_data.get("sync_table_id")
+    if not sync_table_id:
+        return False
+
+    db = SessionLocal()
+    try:
+        sync_table = db.query(SyncTable).filter(SyncTable.id == sync_table_id).first()
+        if not sync_table:
+            logger.warning(f"Sync table {sync_table_id} no longer exists, not storing its watermark")
+            return False
+
+        state = get_sync_state(db, sync_table_id)
+        if not state:
+            state = SyncState(sync_table_id=sync_table_id)
+            db.add(state)
+
+        cursor_value = job_data.get("cursor_value")
+        state.use_ctid = job_data.get("use_ctid", True)
+        state.cursor_column = job_data.get("cursor_column")
+        state.cursor_value = str(cursor_value) if cursor_value is not None else None
+        state.extract_job_id = job_data.get("id")
+        state.records_synced = records_synced
+        state.committed_at = datetime.now()
+        sync_table.last_synced_at = state.committed_at
+
+        db.commit()
+        logger.info(f"Committed watermark {state.cursor_value} for sync table {sync_table_id}")
+        return True
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Failed to commit watermark for sync table {sync_table_id}: {str(e)}")
+        return False
+    finally:
+        db.close()
+
+def reset_sync_state(db, sync_table_id):
+    """
+    Drop the stored watermark so the next sync of the table starts from the beginning.
+
+    Nothing is committed, so the caller can reset the watermark in the same
+    transaction as the change that invalidates it.
+
+    Returns:
+        bool: True if a watermark was removed
+    """
+    state = get_sync_state(db, sync_table_id)
+    if not state:
+        return False
+    db.delete(state)
+    return True
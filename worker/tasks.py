@@ -2,39 +2,62 @@ import asyncio
 import logging
 import os
 import glob
-import json
 from datetime import datetime, timezone
+from celery import chord
 
 from worker.celery_app import celery_app
 from worker.job_manager import update_job_status, get_job_status
 from core.jobs import ExtractJob, LoadJob
+from core import serialization
 from connector.postgres_extractor import PostgresExtractor
 from connector.transformer import Transformer
+from connector.spool import READABLE_EXTENSIONS
 from connector.bigquery_loader import BigQueryLoader
+from worker.pipeline import run_streaming_etl
+from worker.sync_state import commit_sync_state
+from connector.postgres_source import AsyncPostgresSource
+from models.database import Source
+from models.schema_drift import store_schema
+from session_manager import SessionLocal
 
 logger = logging.getLogger("extract.tasks")
 
+# Transform batch files as parallel sub-tasks when the request doesn't say (off unless enabled)
+TRANSFORM_PARALLEL = os.getenv("TRANSFORM_PARALLEL", "false").lower() in ("1", "true", "yes")
+
+# Sources whose schemas are fetched at once by the drift detection task
+SCHEMA_DRIFT_CONCURRENCY = int(os.getenv("SCHEMA_DRIFT_CONCURRENCY", 4))
+
 @celery_app.task(name="extract.process_job", bind=True)
-def process_job_task(self, job_dict, conn_params, save_to_disk=True):
+def process_job_task(self, job_dict, conn_params, save_to_disk=True, offload_result=True):
     task_id = self.request.id
     job_dict['celery_task_id'] = task_id
     job_dict['status'] = 'running'
     job_dict['updated_at'] = datetime.now().isoformat()
     update_job_status(ExtractJob(**job_dict))
 
-    # Initialize extractor with save_to_disk option
-    extractor = PostgresExtractor(conn_params, save_to_disk=save_to_disk)
+    # Initialize extractor with save_to_disk option; when offloading, the task
+    # result only carries a manifest of spool files, not the extracted rows
+    extractor = PostgresExtractor(conn_params, save_to_disk=save_to_disk, offload_result=offload_result and save_to_disk)
 
     result = asyncio.run(extractor.extract_incremental(job_dict))
     return result
 
-def add_extract_job(source_db_id, table_name, use_ctid=True, cursor_column=None, cursor_value=None, batch_size=1000, conn_params=None):
+def add_extract_job(source_db_id, table_name, use_ctid=True, cursor_column=None, cursor_value=None, batch_size=1000, conn_params=None, extract_mode="keyset", copy_format="csv", parallelism=1, sync_table_id=None, spool_format="json", column_types=None, raw_id_columns=None, output_mode="raw"):
     job = ExtractJob(
         table_name=table_name,
         use_ctid=use_ctid,
         cursor_column=cursor_column if not use_ctid else None,
         cursor_value=cursor_value,
-        batch_size=batch_size
+        batch_size=batch_size,
+        extract_mode=extract_mode,
+        copy_format=copy_format,
+        parallelism=parallelism,
+        sync_table_id=sync_table_id,
+        spool_format=spool_format,
+        column_types=column_types,
+        raw_id_columns=raw_id_columns,
+        output_mode=output_mode
     )
     job_dict = job.to_dict()
     result = process_job_task.delay(job_dict, conn_params)
@@ -44,8 +67,8 @@ def add_extract_job(source_db_id, table_name, use_ctid=True, cursor_column=None,
     return job
 
 @celery_app.task(name="etl.process_pipeline", bind=True)
-def process_etl_pipeline(self, job_dict, conn_params, destination_config, dataset, table):
-    """Run the full ETL pipeline in one go without intermediate files"""
+def process_etl_pipeline(self, job_dict, conn_params, destination_config, dataset, table, batch_format="records"):
+    """Run the full ETL pipeline as streaming stages without intermediate files"""
     # Set up the job
     job = ExtractJob(**job_dict)
     job.celery_task_id = self.request.id
@@ -54,31 +77,23 @@ def process_etl_pipeline(self, job_dict, conn_params, destination_config, datase
     update_job_status(job)
     
     try:
-        # 1. Extract
-        logger.info(f"Starting extraction for table {job.table_name}")
-        extractor = PostgresExtractor(conn_params, save_to_disk=False)
-        extract_result = asyncio.run(extractor.extract_incremental(job_dict))
-        
-        if not extract_result["success"]:
-            logger.error(f"Extraction failed: {extract_result['error']}")
-            return {"success": False, "stage": "extract", "error": extract_result["error"]}
-        
-        # 2. Transform
-        logger.info(f"Starting transformation of {len(extract_result['batches'])} batches")
-        transformer = Transformer()
-        transformed_data = transformer.transform_batches(extract_result["batches"])
-        
-        # 3. Load
-        logger.info(f"Starting load to BigQuery {dataset}.{table}")
+        # Extract -> transform -> load, batch by batch with bounded queues
+        logger.info(f"Starting streaming ETL for table {job.table_name} to BigQuery {dataset}.{table}")
+        extractor = PostgresExtractor(conn_params, save_to_disk=False, batch_format=batch_format)
+        transformer = Transformer(
+            raw_id_columns=job.raw_id_columns,
+            output_mode=job.output_mode,
+            column_types=job.column_types
+        )
         loader = BigQueryLoader(destination_config)
-        
-        # Add loading timestamp to records
-        loaded_at = datetime.now(timezone.utc).isoformat()
-        for record in transformed_data:
-            record["_loaded_at"] = loaded_at
+        load_schema = loader.typed_schema(job.column_types) if job.output_mode == "typed" and job.column_types else None
+        records_transformed, records_loaded = asyncio.run(
+            run_streaming_etl(extractor, job, transformer, loader, dataset, table, load_schema=load_schema)
+        )
 
-        # Load to BigQuery
-        load_result = loader.load_to_bigquery(dataset, table, transformed_data)
+        job.status = "completed"
+        job.updated_at = datetime.now().isoformat()
+        update_job_status(job)
         
         # Create load job record
         load_job = LoadJob(
@@ -87,18 +102,21 @@ def process_etl_pipeline(self, job_dict, conn_params, destination_config, datase
             destination_config=destination_config,
             dataset=dataset,
             table=table,
-            status="completed" if load_result else "failed",
-            records_loaded=len(transformed_data) if load_result else 0
+            status="completed",
+            records_loaded=records_loaded
         )
         update_job_status(load_job)
+
+        # Advance the sync table's watermark now that the data is loaded
+        commit_sync_state(job, records_loaded)
         
-        logger.info(f"ETL pipeline completed: extracted {job.extracted_records} records, loaded {len(transformed_data)} records")
+        logger.info(f"ETL pipeline completed: extracted {job.extracted_records} records, loaded {records_loaded} records")
         return {
             "success": True, 
             "extract_job_id": job.id,
             "load_job_id": load_job.id,
             "records_extracted": job.extracted_records,
-            "records_loaded": len(transformed_data)
+            "records_loaded": records_loaded
         }
     
     except Exception as e:
@@ -109,14 +127,21 @@ def process_etl_pipeline(self, job_dict, conn_params, destination_config, datase
         update_job_status(job)
         return {"success": False, "error": str(e)}
 
-def add_etl_job(source_db_id, table_name, conn_params, destination_config, dataset, table, use_ctid=True, cursor_column=None, cursor_value=None, batch_size=1000):
+def add_etl_job(source_db_id, table_name, conn_params, destination_config, dataset, table, use_ctid=True, cursor_column=None, cursor_value=None, batch_size=1000, extract_mode="keyset", copy_format="csv", parallelism=1, sync_table_id=None, batch_format="records", raw_id_columns=None, output_mode="raw", column_types=None):
     """Create and queue a combined ETL job"""
     job = ExtractJob(
         table_name=table_name,
         use_ctid=use_ctid,
         cursor_column=cursor_column if not use_ctid else None,
         cursor_value=cursor_value,
-        batch_size=batch_size
+        batch_size=batch_size,
+        extract_mode=extract_mode,
+        copy_format=copy_format,
+        parallelism=parallelism,
+        sync_table_id=sync_table_id,
+        raw_id_columns=raw_id_columns,
+        output_mode=output_mode,
+        column_types=column_types
     )
     job_dict = job.to_dict()
     update_job_status(job)
@@ -127,7 +152,8 @@ def add_etl_job(source_db_id, table_name, conn_params, destination_config, datas
         conn_params, 
         destination_config, 
         dataset, 
-        table
+        table,
+        batch_format
     )
     
     # Update job with Celery task ID
@@ -137,9 +163,47 @@ def add_etl_job(source_db_id, table_name, conn_params, destination_config, datas
     logger.info(f"Added ETL job {job.id} to Celery queue for {table_name} to {dataset}.{table}")
     return job
 
+def _batch_number(batch_file, prefix):
+    """Batch number of a spool file named {table}_{job_id}_{batch_num}_{timestamp}.{ext}"""
+    rest = os.path.basename(batch_file)[len(prefix):]
+    try:
+        return int(rest.split("_")[0])
+    except ValueError:
+        return 0
+
+def _transform_file(transformer, batch_file, transform_dir):
+    """Transform a batch file into the transformed directory and return (path, records)"""
+    transformed_data = transformer.transform_batch_from_file(batch_file)
+
+    filename = os.path.splitext(os.path.basename(batch_file))[0] + '_transformed.json'
+    transform_path = os.path.join(transform_dir, filename)
+    serialization.dump(transformed_data, transform_path)
+
+    logger.info(f"Transformed batch saved to {transform_path}")
+    return transform_path, len(transformed_data)
+
+def _transform_result(extract_job_id, transformed_files, total_transformed, generation_id, output_mode, column_types):
+    logger.info(f"Successfully transformed {total_transformed} records across {len(transformed_files)} batches")
+    return {
+        "extract_job_id": extract_job_id,
+        "transformed_files": transformed_files,
+        "total_transformed": total_transformed,
+        "generation_id": generation_id,
+        "output_mode": output_mode,
+        "column_types": column_types
+    }
+
 @celery_app.task(name="transform.process_data", bind=True)
-def process_transform_task(self, extract_job_id, generation_id=None):
-    """Transform extracted data into Airbyte format"""
+def process_transform_task(self, extract_job_id, generation_id=None, parallel=None):
+    """
+    Transform extracted data into Airbyte format
+
+    Args:
+        extract_job_id: ID of the completed extract job
+        generation_id: Generation identifier (default: a new UUID)
+        parallel: Transform the batch files as parallel sub-tasks and collect
+            their results in order (default: TRANSFORM_PARALLEL)
+    """
     task_id = self.request.id
     
     # Get extract job details
@@ -149,12 +213,21 @@ def process_transform_task(self, extract_job_id, generation_id=None):
         return False
     
     # Create transformer
-    transformer = Transformer(generation_id)
+    transformer_options = {
+        "raw_id_columns": extract_job_data.get("raw_id_columns"),
+        "output_mode": extract_job_data.get("output_mode", "raw"),
+        "column_types": extract_job_data.get("column_types")
+    }
+    transformer = Transformer(generation_id, **transformer_options)
     
-    # Find all output files for this job
+    # Find all output files for this job, in batch order
     output_dir = os.path.join(os.getcwd(), "data", "output")
-    pattern = f"{extract_job_data['table_name']}_{extract_job_id}_*_*.json"
-    batch_files = glob.glob(os.path.join(output_dir, pattern))
+    prefix = f"{extract_job_data['table_name']}_{extract_job_id}_"
+    batch_files = []
+    for extension in READABLE_EXTENSIONS:
+        pattern = f"{prefix}*_*.{extension}"
+        batch_files.extend(glob.glob(os.path.join(output_dir, pattern)))
+    batch_files.sort(key=lambda batch_file: _batch_number(batch_file, prefix))
     
     if not batch_files:
         logger.error(f"No batch files found for extract job {extract_job_id}")
@@ -163,37 +236,66 @@ def process_transform_task(self, extract_job_id, generation_id=None):
     # Transform each batch and save to transformed directory
     transform_dir = os.path.join(os.getcwd(), "data", "transformed")
     os.makedirs(transform_dir, exist_ok=True)
+
+    if parallel is None:
+        parallel = TRANSFORM_PARALLEL
+    if parallel and len(batch_files) > 1:
+        # One sub-task per file; the chord returns their results in header order.
+        # All files share the transformer's generation id.
+        logger.info(f"Transforming {len(batch_files)} batches of extract job {extract_job_id} in parallel")
+        header = [
+            transform_file_task.s(batch_file, transform_dir, transformer.generation_id, transformer_options)
+            for batch_file in batch_files
+        ]
+        callback = collect_transform_results.s(extract_job_id, transformer.generation_id, transformer_options)
+        return self.replace(chord(header, callback))
     
     total_transformed = 0
     transformed_files = []
 
     for batch_file in batch_files:
         try:
-            # Transform the batch
-            transformed_data = transformer.transform_batch_from_file(batch_file)
-            total_transformed += len(transformed_data)
-            
-            # Save the transformed batch
-            filename = os.path.basename(batch_file).replace('.json', '_transformed.json')
-            transform_path = os.path.join(transform_dir, filename)
-            
-            with open(transform_path, 'w') as f:
-                json.dump(transformed_data, f)
-                
+            transform_path, records = _transform_file(transformer, batch_file, transform_dir)
+            total_transformed += records
             transformed_files.append(transform_path)
-            logger.info(f"Transformed batch saved to {transform_path}")
-            
         except Exception as e:
             logger.error(f"Error transforming batch {batch_file}: {str(e)}")
             return False
     
-    logger.info(f"Successfully transformed {total_transformed} records across {len(batch_files)} batches")
-    return {
-        "extract_job_id": extract_job_id,
-        "transformed_files": transformed_files,
-        "total_transformed": total_transformed,
-        "generation_id": transformer.generation_id
-    }
+    return _transform_result(
+        extract_job_id,
+        transformed_files,
+        total_transformed,
+        transformer.generation_id,
+        transformer.output_mode,
+        transformer.column_types
+    )
+
+@celery_app.task(name="transform.process_file", bind=True)
+def transform_file_task(self, batch_file, transform_dir, generation_id, transformer_options):
+    """Transform one batch file; returns [path, records], or None on failure"""
+    try:
+        transformer = Transformer(generation_id, **transformer_options)
+        transform_path, records = _transform_file(transformer, batch_file, transform_dir)
+        return [transform_path, records]
+    except Exception as e:
+        logger.error(f"Error transforming batch {batch_file}: {str(e)}")
+        return None
+
+@celery_app.task(name="transform.collect_results", bind=True)
+def collect_transform_results(self, results, extract_job_id, generation_id, transformer_options):
+    """Combine the per-file results of a parallel transform, in batch order"""
+    if any(result is None for result in results):
+        logger.error(f"Transform of extract job {extract_job_id} failed for {sum(result is None for result in results)} batches")
+        return False
+    return _transform_result(
+        extract_job_id,
+        [transform_path for transform_path, _ in results],
+        sum(records for _, records in results),
+        generation_id,
+        transformer_options["output_mode"],
+        transformer_options["column_types"]
+    )
 
 @celery_app.task(name="load.process_data", bind=True)
 def process_load_task(self, load_job_dict, transform_result):
@@ -214,23 +316,25 @@ def process_load_task(self, load_job_dict, transform_result):
             update_job_status(job)
             return False
             
-        # Initialize the loader
+        # Initialize the loader; typed records are loaded with an explicit schema
         loader = BigQueryLoader(job.destination_config)
+        load_schema = None
+        if transform_result.get("output_mode") == "typed" and transform_result.get("column_types"):
+            load_schema = loader.typed_schema(transform_result["column_types"])
         
         # Process each transformed file
         total_loaded = 0
         for file_path in transform_result["transformed_files"]:
             # Load the transformed data
-            with open(file_path, 'r') as f:
-                transformed_data = json.load(f)
+            transformed_data = serialization.load(file_path)
                 
             # Add loading timestamp to the records
             loaded_at = datetime.now(timezone.utc).isoformat()
             for record in transformed_data:
-                record["_airbyte_loaded_at"] = loaded_at
+                record["_loaded_at"] = loaded_at
                 
             # Load the data to BigQuery
-            loader.load_to_bigquery(job.dataset, job.table, transformed_data)
+            loader.load_to_bigquery(job.dataset, job.table, transformed_data, schema=load_schema)
             total_loaded += len(transformed_data)
             
             # Update job status
@@ -242,6 +346,11 @@ def process_load_task(self, load_job_dict, transform_result):
         job.status = "completed"
         job.updated_at = datetime.now().isoformat()
         update_job_status(job)
+
+        # Advance the sync table's watermark now that the data is loaded
+        extract_job_data = get_job_status(job.extract_job_id)
+        if extract_job_data:
+            commit_sync_state(extract_job_data, total_loaded)
         logger.info(f"Successfully loaded {total_loaded} records to {job.dataset}.{job.table}")
         return True
     
@@ -279,4 +388,65 @@ def add_load_job(extract_job_id, destination_type, destination_config, dataset,
     update_job_status(job)
     
     logger.info(f"Added load job {job.id} to Celery queue for {dataset}.{table}")
-    return job
\ No newline at end of file
+    return job
+
+async def _fetch_source_schemas(sources, concurrency):
+    """Fetch the schemas of Sources, at most `concurrency` at a time"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(source):
+        async with semaphore:
+            # Fresh connections: each task run has its own event loop
+            postgres = AsyncPostgresSource(
+                host=source["host"],
+                port=source["port"],
+                database=source["database"],
+                user=source["user"],
+                password=source["password"],
+                schemas=source["schemas"]
+            )
+            return await postgres.fetch_schema()
+
+    return await asyncio.gather(*(fetch(source) for source in sources))
+
+@celery_app.task(name="schema.detect_drift", bind=True)
+def detect_schema_drift_task(self):
+    """Refresh the schema of every active Source and record the ones that changed"""
+    db = SessionLocal()
+    try:
+        sources = [
+            {
+                "id": source.id,
+                "host": source.host,
+                "port": source.port,
+                "database": source.database,
+                "user": source.user,
+                "password": source.password,
+                "schemas": source.schemas
+            }
+            for source in db.query(Source).filter(Source.is_active == True).all()
+        ]
+        schemas = asyncio.run(_fetch_source_schemas(sources, SCHEMA_DRIFT_CONCURRENCY))
+
+        # Store one Source at a time so a failure doesn't lose the others
+        changed, failed = [], []
+        for source, schema in zip(sources, schemas):
+            if not schema:
+                failed.append(source["id"])
+                continue
+            try:
+                previous, new_version = store_schema(db, source["id"], schema)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Failed to store schema of source {source['id']}: {str(e)}")
+                failed.append(source["id"])
+                continue
+            if new_version is not None and previous is not None:
+                logger.info(f"Schema drift in source {source['id']}: version {previous.version} -> {new_version.version}")
+                changed.append(source["id"])
+
+        logger.info(f"Schema drift check done: {len(sources)} sources, {len(changed)} changed, {len(failed)} failed")
+        return {"sources": len(sources), "changed": changed, "failed": failed}
+    finally:
+        db.close()